@@ -0,0 +1,50 @@
+"""
+Benchmarks "%path%" lookups on a large app conf, from dicts and from a
+memory-mapped store, and how much memory holding each one takes.
+"""
+import os
+import tempfile
+import tracemalloc
+
+from pyrovider.services.confstore import open_conf_store, write_conf_store
+from pyrovider.services.provider import ServiceProvider
+
+from .harness import bench
+
+
+def app_conf(tables: int = 100, rows: int = 1000) -> dict:
+    return {f"table{i}": {f"row{j}": {'enabled': bool(j % 2), 'weight': j, 'name': f"feature-{i}-{j}"}
+                          for j in range(rows)}
+            for i in range(tables)}
+
+
+def allocated(load: callable) -> int:
+    tracemalloc.start()
+    conf = load()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del conf
+
+    return size
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        store_path = os.path.join(directory, 'app_conf.store')
+        write_conf_store(store_path, app_conf())
+
+        print(f"dicts: {allocated(app_conf) / 2 ** 20:.1f} MiB allocated, "
+              f"store: {allocated(lambda: open_conf_store(store_path)) / 2 ** 20:.3f} MiB allocated, "
+              f"{os.path.getsize(store_path) / 2 ** 20:.1f} MiB mapped")
+
+        for label, conf in (('dicts', app_conf()), ('store', open_conf_store(store_path))):
+            provider = ServiceProvider()
+            provider.conf({}, conf)
+            bench(f"{label}: uncached %table99.row999.name%",
+                  lambda: provider._lookup_conf('table99.row999.name'))
+            bench(f"{label}: cached %table99.row999.name%",
+                  lambda: provider._get_conf('table99.row999.name'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""
+Benchmarks the per-request overhead of the context backends: a few get() and
+set() calls followed by reset(), as a request handler would do.
+"""
+from pyrovider.services.context import ContextVarBackend, LocalBackend
+from pyrovider.services.provider import ServiceProvider
+
+from .harness import bench
+
+FIXTURES = 'benchmarks.fixtures'
+
+SERVICE_CONF = {
+    'instance': {'instance': f'{FIXTURES}.instance'},
+    'leaf': {'class': f'{FIXTURES}.Leaf'},
+    'scoped': {'class': f'{FIXTURES}.Leaf', 'scope': 'context'},
+}
+
+
+def request(provider: ServiceProvider):
+    provider.set('leaf', object)
+    provider.get('instance')
+    provider.get('leaf')
+    provider.get('scoped')
+    provider.get('scoped')
+    provider.reset()
+
+
+def main():
+    for backend in (ContextVarBackend, LocalBackend):
+        provider = ServiceProvider(context=backend())
+        provider.conf(SERVICE_CONF)
+
+        bench(f"{backend.__name__}: get('instance')", lambda: provider.get('instance'))
+        bench(f"{backend.__name__}: request", lambda: request(provider))
+
+
+if __name__ == '__main__':
+    main()
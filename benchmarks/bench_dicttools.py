@@ -0,0 +1,44 @@
+"""
+Benchmarks walking and sorting a generated document of about 100k nodes,
+and walking one too deep for recursion.
+"""
+import copy
+
+from pyrovider.tools.dicttools import dictleaves, dictsort, dictwalk
+
+from .harness import bench
+
+
+def document(tables: int = 100, rows: int = 250) -> dict:
+    return {f"table{i}": {f"row{j}": {'enabled': bool(j % 2), 'weights': [j % 7, j % 3, j % 5]}
+                          for j in range(rows)}
+            for i in range(tables)}
+
+
+def deep_document(depth: int = 10000) -> dict:
+    root = node = {}
+
+    for _ in range(depth):
+        node['next'] = node = {}
+
+    node['leaf'] = True
+
+    return root
+
+
+def main():
+    doc = document()
+    nodes = sum(1 for _ in dictleaves(doc))
+    print(f"{nodes} leaves")
+
+    bench("dictleaves, paths shared", lambda: sum(1 for _ in dictleaves(doc)), number=3, repeat=3)
+    bench("dictleaves, paths copied", lambda: [tuple(p) for p, v in dictleaves(doc)], number=3, repeat=3)
+    bench("dictwalk, identity", lambda: dictwalk(doc, lambda k, v, path: v), number=3, repeat=3)
+    bench("dictsort", lambda: dictsort(copy.deepcopy(doc)), number=3, repeat=3)
+
+    deep = deep_document()
+    bench("dictleaves, 10000 levels deep", lambda: list(dictleaves(deep)), number=3, repeat=3)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+"""
+Benchmarks attribute access through namespaces on a provider with several
+hundred services spread over nested namespaces.
+"""
+from pyrovider.services.provider import ServiceProvider
+
+from .harness import bench
+
+FIXTURES = 'benchmarks.fixtures'
+
+
+def service_conf(namespaces: int = 10, services: int = 50) -> dict:
+    conf = {f"svc{j}": {'instance': f'{FIXTURES}.instance'} for j in range(services)}
+
+    for i in range(namespaces):
+        for j in range(services):
+            conf[f"ns{i}.sub.svc{j}"] = {'instance': f'{FIXTURES}.instance'}
+
+    return conf
+
+
+def main():
+    provider = ServiceProvider()
+    provider.conf(service_conf())
+    ns = provider.ns9.sub
+
+    bench("provider.svc49", lambda: provider.svc49)
+    bench("provider.ns9", lambda: provider.ns9)
+    bench("provider.ns9.sub.svc49", lambda: provider.ns9.sub.svc49)
+    bench("ns.svc49 (namespace held)", lambda: ns.svc49)
+    bench("ns.get('svc49')", lambda: ns.get('svc49'))
+    bench("provider.get('ns9.sub.svc49')", lambda: provider.get('ns9.sub.svc49'))
+
+
+if __name__ == '__main__':
+    main()
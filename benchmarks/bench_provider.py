@@ -0,0 +1,66 @@
+"""
+Benchmarks ServiceProvider.get() for the different kinds of service definitions.
+"""
+import os
+
+from pyrovider.services.provider import ServiceProvider
+
+from .harness import bench
+
+FIXTURES = 'benchmarks.fixtures'
+
+SERVICE_CONF = {
+    'instance': {'instance': f'{FIXTURES}.instance'},
+    'leaf': {'class': f'{FIXTURES}.Leaf'},
+    'node': {
+        'class': f'{FIXTURES}.Node',
+        'arguments': ['@leaf', '%app.url%', '$BENCH_ENV_VAR', 'literal', ['@leaf', '@instance']],
+        'named_arguments': {'timeout': 30, 'debug': [r'$BENCH_DEBUG', 'False']},
+    },
+    'factory': {
+        'factory': f'{FIXTURES}.NodeFactory',
+        'arguments': ['@node'],
+        'named_arguments': {'leaf': '@leaf'},
+    },
+    'pooled-factory': {
+        'factory': f'{FIXTURES}.NodeFactory',
+        'arguments': ['@node'],
+        'named_arguments': {'leaf': '@leaf'},
+        'pool': 4,
+    },
+    'memoized-factory': {
+        'factory': f'{FIXTURES}.NodeFactory',
+        'arguments': ['@node'],
+        'named_arguments': {'leaf': '@leaf'},
+        'memoize': {'max_size': 16},
+    },
+}
+
+APP_CONF = {'app': {'url': 'https://example.com/'}}
+
+
+def main():
+    os.environ.setdefault('BENCH_ENV_VAR', '42')
+
+    provider = ServiceProvider()
+    provider.conf(SERVICE_CONF, APP_CONF)
+
+    for name in ('instance', 'leaf', 'node', 'factory'):
+        bench(f"get('{name}')", lambda: provider.get(name))
+
+    bench("get('factory', leaf=...)", lambda: provider.get('factory', leaf=object))
+    bench("get('memoized-factory', leaf=...)", lambda: provider.get('memoized-factory', leaf=object))
+
+    def acquire():
+        with provider.acquire('pooled-factory'):
+            pass
+
+    bench("acquire('pooled-factory')", acquire)
+
+    names = ['instance', 'leaf', 'node', 'factory']
+    bench("get() x 4", lambda: [provider.get(name) for name in names])
+    bench("get_many(4 names)", lambda: provider.get_many(names))
+
+
+if __name__ == '__main__':
+    main()
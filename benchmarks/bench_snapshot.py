@@ -0,0 +1,44 @@
+"""
+Benchmarks building a provider from a large YAML service conf, parsing it
+every time versus loading it from a snapshot.
+"""
+import os
+import tempfile
+import yaml
+
+from pyrovider.services.factories import service_provider_from_yaml
+
+from .harness import bench
+
+FIXTURES = 'benchmarks.fixtures'
+
+
+def write_service_conf(path: str, services: int = 2000):
+    conf = {}
+
+    for i in range(services):
+        conf[f"ns{i % 20}.svc{i}"] = {'class': f'{FIXTURES}.Node',
+                                      'arguments': [f'@ns{(i - 1) % 20}.svc{i - 1}' if i else 'root',
+                                                    '%app.url%', ['$SOME_VAR', 'default']],
+                                      'named_arguments': {'timeout': i}}
+
+    with open(path, 'w') as fp:
+        yaml.dump(conf, fp)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        conf_path = os.path.join(directory, 'service_conf.yaml')
+        snapshot_path = os.path.join(directory, 'snapshot.bin')
+        write_service_conf(conf_path)
+
+        bench("from_yaml, 2000 services", lambda: service_provider_from_yaml(conf_path),
+              number=3, repeat=3)
+        service_provider_from_yaml(conf_path, snapshot_path=snapshot_path)
+        bench("from_yaml, 2000 services, snapshot",
+              lambda: service_provider_from_yaml(conf_path, snapshot_path=snapshot_path),
+              number=3, repeat=3)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Benchmarks service_provider_from_sources() on many generated source files,
+with the pure Python and libyaml loaders, parsing sequentially and on a
+process pool.
+"""
+import os
+import tempfile
+import yaml
+
+from pyrovider.services import factories
+
+from .harness import bench
+
+FIXTURES = 'benchmarks.fixtures'
+
+
+def write_sources(directory: str, files: int = 40, services: int = 100) -> list:
+    sources = []
+
+    for i in range(files):
+        path = os.path.join(directory, f"source_{i}.yaml")
+        conf = {f"svc-{j}": {'class': f'{FIXTURES}.Node',
+                             'arguments': [f'@svc-{j - 1}' if j else 'root', '%app.url%'],
+                             'named_arguments': {'timeout': j, 'retries': [1, 2, 3]}}
+                for j in range(services)}
+
+        with open(path, 'w') as fp:
+            yaml.dump(conf, fp)
+
+        sources.append(factories.ServiceDefinitionSource(f"source{i}", path))
+
+    return sources
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        sources = write_sources(directory)
+        loader = factories.YamlLoader
+
+        try:
+            factories.YamlLoader = yaml.FullLoader
+            bench("40 sources, FullLoader",
+                  lambda: factories.service_provider_from_sources(*sources), number=1, repeat=3)
+        finally:
+            factories.YamlLoader = loader
+
+        bench(f"40 sources, {loader.__name__}",
+              lambda: factories.service_provider_from_sources(*sources), number=1, repeat=3)
+        bench(f"40 sources, {loader.__name__}, 4 processes",
+              lambda: factories.service_provider_from_sources(*sources, max_workers=4), number=1, repeat=3)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+"""
+Services used by the benchmark confs.
+"""
+from pyrovider.services.provider import ServiceFactory
+
+
+class Leaf():
+
+    pass
+
+
+class Node():
+
+    def __init__(self, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+
+
+class NodeFactory(ServiceFactory):
+
+    def __init__(self, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+
+    def build(self):
+        return Node(*self.args, **self.kwargs)
+
+
+def instance():
+    pass
@@ -0,0 +1,27 @@
+"""
+Minimal timing harness shared by the benchmark scripts.
+
+Run any benchmark from the repository root, e.g.:
+
+    python -m benchmarks.bench_provider
+
+or the whole suite, comparing it with the recorded baselines:
+
+    python -m benchmarks.suite
+"""
+import timeit
+
+from typing import Callable
+
+
+def measure(func: Callable, number: int = 10000, repeat: int = 5) -> float:
+    """The best per-call duration of ``func``, in seconds."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def bench(label: str, func: Callable, number: int = 10000, repeat: int = 5):
+    """Time ``func`` and print the best per-call duration in microseconds."""
+    best = measure(func, number=number, repeat=repeat)
+    print(f"{label:<50} {best * 1e6:10.3f} us")
+
+    return best
@@ -0,0 +1,153 @@
+"""
+The benchmark suite of the provider hot paths, compared with baselines.
+
+    python -m benchmarks.suite                  # compare with baseline.json
+    python -m benchmarks.suite --save           # record new baselines
+    python -m benchmarks.suite -k conf -k get   # only the matching cases
+
+Exits with status 1 when a case is slower than its baseline by more than the
+tolerance (100% by default: timings are noisy, this catches regressions, not
+small drifts). Baselines depend on the machine, record them again when it
+changes.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from pyrovider.services import factories
+from pyrovider.services.provider import Namespace, ServiceProvider
+
+from . import bench_namespaces, bench_provider, bench_sources
+from .harness import measure
+
+FIXTURES = 'benchmarks.fixtures'
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def chain_conf(depth: int) -> dict:
+    conf = {'c0': {'class': f'{FIXTURES}.Leaf'}}
+
+    for i in range(1, depth):
+        conf[f'c{i}'] = {'class': f'{FIXTURES}.Node', 'arguments': [f'@c{i - 1}']}
+
+    return conf
+
+
+def provider_chain(depth: int, siblings: int = 5) -> ServiceProvider:
+    """A provider whose parents are nested depth levels deep, each with siblings."""
+    parent = ServiceProvider(name='p0')
+    parent.conf({'svc': {'instance': f'{FIXTURES}.instance'}})
+
+    for i in range(1, depth):
+        others = [ServiceProvider(name=f'other{i}-{j}') for j in range(siblings)]
+        parent = ServiceProvider(*others, parent, name=f'p{i}')
+
+    return ServiceProvider(parent)
+
+
+def large_conf(services: int) -> dict:
+    conf = {}
+
+    for i in range(services):
+        conf[f"ns{i % 20}.svc{i}"] = {'class': f'{FIXTURES}.Node',
+                                      'arguments': [f'@ns{(i - 1) % 20}.svc{i - 1}' if i else 'root',
+                                                    '%app.url%', ['$BENCH_ENV_VAR', 'default']],
+                                      'named_arguments': {'timeout': i}}
+
+    return conf
+
+
+def cases(directory: str):
+    """(label, callable, number of calls per timing) for every case."""
+    os.environ.setdefault('BENCH_ENV_VAR', '42')
+
+    provider = ServiceProvider()
+    provider.conf(bench_provider.SERVICE_CONF, bench_provider.APP_CONF)
+
+    for name in ('instance', 'leaf', 'factory'):
+        yield f"get('{name}')", lambda name=name: provider.get(name), 10000
+
+    # Fixed, so the case keeps its baseline when services are added to the conf.
+    names = ['instance', 'leaf', 'node', 'factory', 'pooled-factory']
+    yield f"get_many({len(names)} names)", lambda: provider.get_many(names), 10000
+
+    for depth in (10, 50):
+        chain = ServiceProvider()
+        chain.conf(chain_conf(depth))
+        yield f"get(), @ chain of {depth}", lambda chain=chain, depth=depth: chain.get(f'c{depth - 1}'), 1000
+
+    chained = provider_chain(5)
+    qualified = '.'.join(f'p{i}' for i in range(4, -1, -1)) + '.svc'
+    yield "get(), 5 parent providers deep", lambda: chained.get(qualified), 10000
+
+    resolution = ServiceProvider()
+    resolution.conf({'conf': {'class': f'{FIXTURES}.Node', 'arguments': ['%app.url%', '%app.url%']},
+                     'env': {'class': f'{FIXTURES}.Node',
+                             'arguments': ['$BENCH_ENV_VAR', ['$BENCH_MISSING_VAR', '%app.url%']]}},
+                    bench_provider.APP_CONF)
+    yield "get(), %conf% arguments", lambda: resolution.get('conf'), 10000
+    yield "get(), $ENV arguments", lambda: resolution.get('env'), 10000
+
+    namespaced = ServiceProvider()
+    namespaced.conf(bench_namespaces.service_conf())
+    ns = namespaced.ns9.sub
+    yield "provider.ns9.sub.svc49", lambda: namespaced.ns9.sub.svc49, 10000
+    yield "Namespace.__getattr__('svc49')", lambda: Namespace.__getattr__(ns, 'svc49'), 10000
+
+    for services in (1000, 10000):
+        conf = large_conf(services)
+        yield f"conf(), {services} services", lambda conf=conf: ServiceProvider().conf(conf), 1
+
+    sources = bench_sources.write_sources(directory, files=10)
+    yield "from_sources, 10 sources", lambda: factories.service_provider_from_sources(*sources), 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--save', action='store_true', help="record the timings as the new baselines")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--tolerance', type=float, default=1.0)
+    parser.add_argument('-k', dest='patterns', action='append', help="only the cases containing this")
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.baseline) as fp:
+            baselines = json.load(fp)
+    except FileNotFoundError:
+        baselines = {}
+
+    results = {}
+    regressions = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        for label, func, number in cases(directory):
+            if args.patterns and not any(p in label for p in args.patterns):
+                continue
+
+            results[label] = best = measure(func, number=number, repeat=5 if 1 < number else 3)
+            baseline = baselines.get(label)
+            change = f"{(best / baseline - 1) * 100:+7.1f}%" if baseline else "    new"
+            print(f"{label:<50} {best * 1e6:12.3f} us {change}")
+
+            if baseline and best > baseline * (1 + args.tolerance):
+                regressions.append(label)
+
+    if args.save:
+        with open(args.baseline, 'w') as fp:
+            json.dump(dict(baselines, **results), fp, indent=2, sort_keys=True)
+            fp.write("\n")
+
+        return 0
+
+    if regressions:
+        print(f"\nSlower than the baseline by more than {args.tolerance:.0%}: " + ", ".join(regressions))
+
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,14 +1,65 @@
 import importlib
+import logging
+import sys
+import threading
+import time
+
+from typing import Iterable
 from .construction import Singleton
 
+logger = logging.getLogger()
+
 
 class Importer(metaclass=Singleton):
+    """
+    Imports objects by their dotted path.
+
+    Modules are imported lazily, on the first get_obj() of an object in them,
+    unless preload() imports them beforehand. Either way, how long importing
+    took is recorded in import_times, per target.
+    """
 
-    @staticmethod
-    def get_obj(class_path: str) -> type:
+    def __init__(self):
+        self.import_times = {}
+        self.preload_errors = {}
+
+    def get_obj(self, class_path: str) -> type:
         """Get a class by its path."""
         module_parts = class_path.split('.')
         module_name = ".".join(module_parts[:-1])
-        module = importlib.import_module(module_name)
+
+        if module_name in sys.modules:
+            module = importlib.import_module(module_name)
+        else:
+            start = time.perf_counter()
+            module = importlib.import_module(module_name)
+            self.import_times.setdefault(class_path, time.perf_counter() - start)
 
         return module.__dict__[module_parts[-1:][0]]
+
+    def preload(self, class_paths: Iterable[str], background: bool = False) -> threading.Thread:
+        """
+        Imports the given objects now, instead of on their first get_obj().
+        Failures are logged and kept in preload_errors, per target.
+
+        In the background, imports happen in a daemon thread, which is returned.
+        """
+        class_paths = list(class_paths)
+
+        if background:
+            thread = threading.Thread(target=self.preload, args=(class_paths,),
+                                      name='pyrovider-preload', daemon=True)
+            thread.start()
+
+            return thread
+
+        for class_path in class_paths:
+            try:
+                self.get_obj(class_path)
+            except Exception as e:
+                logger.warning('Could not preload "%s": %r', class_path, e)
+                self.preload_errors[class_path] = e
+
+    def slowest_imports(self, limit: int = 10) -> list:
+        """The targets whose import took the longest, with the time in seconds."""
+        return sorted(self.import_times.items(), key=lambda i: i[1], reverse=True)[:limit]
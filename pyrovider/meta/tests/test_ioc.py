@@ -1,5 +1,7 @@
+import sys
 import unittest
 
+from unittest import mock
 from pyrovider.meta.ioc import Importer
 
 
@@ -18,3 +20,38 @@ class ImporterTest(unittest.TestCase):
 
         self.assertEqual("'Undefined'",
                          str(context.exception))
+
+    def test_recording_import_times(self):
+        # Given...
+        importer = Importer()
+        sys.modules.pop('pyrovider.tools.listtools', None)
+        # When...
+        importer.get_obj('pyrovider.tools.listtools.flatten_list')
+        importer.get_obj('pyrovider.meta.ioc.Importer')
+        # Then...
+        self.assertIn('pyrovider.tools.listtools.flatten_list', importer.import_times)
+        self.assertNotIn('pyrovider.meta.ioc.Importer', importer.import_times)
+        self.assertIn(('pyrovider.tools.listtools.flatten_list',
+                       importer.import_times['pyrovider.tools.listtools.flatten_list']),
+                      importer.slowest_imports(limit=len(importer.import_times)))
+
+    def test_preloading(self):
+        # Given...
+        importer = Importer()
+        sys.modules.pop('pyrovider.tools.listtools', None)
+        # When...
+        importer.preload(['pyrovider.tools.listtools.flatten_list', 'pyrovider.meta.ioc.Undefined'])
+        # Then...
+        self.assertIn('pyrovider.tools.listtools', sys.modules)
+        self.assertIsInstance(importer.preload_errors['pyrovider.meta.ioc.Undefined'], KeyError)
+
+    def test_preloading_in_the_background(self):
+        # Given...
+        importer = Importer()
+        sys.modules.pop('pyrovider.tools.listtools', None)
+        # When...
+        thread = importer.preload(['pyrovider.tools.listtools.flatten_list'], background=True)
+        thread.join()
+        # Then...
+        self.assertTrue(thread.daemon)
+        self.assertIn('pyrovider.tools.listtools', sys.modules)
@@ -0,0 +1,189 @@
+import asyncio
+import inspect
+import time
+
+from .context import ContextBackend
+from .provider import UNBUILT, ServicePlan, ServiceProvider, UnknownServiceError
+
+
+class AsyncServiceProvider(ServiceProvider):
+    """
+    A service provider for asyncio applications.
+
+    aget() accepts factories with an "async def build()", resolves the "@"
+    dependencies of a service concurrently with asyncio.gather, and builds
+    singletons only once even when several tasks ask for them at the same time.
+
+    With the default ContextVarBackend, tasks share the per-context state
+    (set and context-scoped services) of the context they were created from.
+    """
+
+    def __init__(self, *providers, name: str = None, context: ContextBackend = None):
+        super().__init__(*providers, name=name, context=context)
+        self._singleton_builds = {}
+
+    def _after_fork(self):
+        super()._after_fork()
+        # Builds awaited in the parent's event loop never finish in the child.
+        self._singleton_builds = {}
+
+    async def areset(self) -> dict:
+        """
+        Like reset(), but the services may be disposed of asynchronously,
+        with an aclose() or __aexit__() method, or a "dispose" one returning
+        an awaitable. Services are still disposed of one after the other.
+        """
+        start = time.perf_counter()
+        disposed = 0
+        errors = []
+
+        for plan, service in self._release():
+            with self._disposing(plan, errors):
+                hook = self.dispose_hook(plan, service, methods=('aclose', '__aexit__', 'close', '__exit__'))
+
+                if hook is not None:
+                    result = hook()
+
+                    if inspect.isawaitable(result):
+                        await result
+
+                    disposed += 1
+
+        return self._report_teardown(disposed, errors, time.perf_counter() - start)
+
+    async def aget(self, name: str, **kwargs):
+        plan = self._plans.get(name)
+
+        if plan is None:
+            route = self._route(name)
+
+            if route is None:
+                raise UnknownServiceError(self.UNKNOWN_SERVICE_ERRMSG.format(name))
+
+            provider, service_key = route
+
+            if isinstance(provider, AsyncServiceProvider):
+                return await provider.aget(service_key, **kwargs)
+
+            return provider.get(service_key, **kwargs)
+
+        if self._instruments:
+            return await self._aget_instrumented(name, plan, kwargs)
+
+        return self._get_set_service(name) or await self._aresolve(plan, kwargs)
+
+    async def _aget_instrumented(self, name: str, plan: ServicePlan, kwargs: dict):
+        # The same ones get both calls, even if instruments are added meanwhile.
+        instruments = self._instruments
+
+        for instrument in instruments:
+            instrument.resolution_started(self, name)
+
+        start = time.perf_counter()
+        method = plan.kind
+        error = None
+
+        try:
+            service = self._get_set_service(name)
+
+            if service:
+                method = 'set'
+
+                return service
+
+            return await self._aresolve(plan, kwargs)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+
+            for instrument in instruments:
+                instrument.resolution_finished(self, name, method, elapsed, error)
+
+    async def _aresolve(self, plan: ServicePlan, kwargs: dict):
+        if plan.error is not None:
+            raise type(plan.error)(*plan.error.args)
+
+        if plan.memo is not None:
+            return await self._aget_memoized(plan, kwargs)
+
+        if kwargs or 'transient' == plan.scope or 'instance' == plan.kind:
+            return await self._abuild(plan, kwargs)
+
+        if 'context' == plan.scope:
+            scoped_services = self._context.state().scoped_services
+
+            if self._instruments:
+                self._notify_cache(plan, plan in scoped_services)
+
+            if plan not in scoped_services:
+                scoped_services[plan] = await self._abuild(plan, kwargs)
+
+            return scoped_services[plan]
+
+        return await self._aget_singleton(plan)
+
+    async def _aget_memoized(self, plan: ServicePlan, kwargs: dict):
+        key = self._memo_key(kwargs)
+
+        if key is None:
+            return await self._abuild(plan, kwargs)
+
+        service, hit = await plan.memo.aget(key, lambda: self._abuild(plan, kwargs))
+
+        if self._instruments:
+            self._notify_cache(plan, hit)
+
+        return service
+
+    async def _aget_singleton(self, plan: ServicePlan):
+        if self._instruments:
+            self._notify_cache(plan, plan.instance is not UNBUILT)
+
+        if plan.instance is not UNBUILT:
+            return plan.instance
+
+        build = self._singleton_builds.get(plan)
+
+        if build is None:
+            self._capture_states()
+            build = asyncio.ensure_future(self._abuild(plan, {}))
+            self._singleton_builds[plan] = build
+
+            def store(future):
+                del self._singleton_builds[plan]
+
+                if not future.cancelled() and future.exception() is None:
+                    plan.instance = future.result()
+
+            build.add_done_callback(store)
+
+        # Shielded so a cancelled caller doesn't cancel the build for everyone else.
+        return await asyncio.shield(build)
+
+    async def _abuild(self, plan: ServicePlan, overrides: dict):
+        # Not the fallbacks of "$ENV" arguments: get() resolves those if they're used.
+        dependencies = plan.required_dependencies(overrides)
+
+        if dependencies:
+            # The tasks of gather() copy the context: states they'd create would be lost.
+            self._capture_states()
+
+        results = await asyncio.gather(*(self.aget(d) for d in dependencies), return_exceptions=True)
+
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+        resolved = dict(zip(dependencies, results))
+
+        def get(name):
+            return resolved[name] if name in resolved else self.get(name)
+
+        service = plan.build(plan, get, overrides)
+
+        if inspect.isawaitable(service):
+            service = await service
+
+        return service
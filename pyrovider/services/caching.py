@@ -0,0 +1,183 @@
+import logging
+import threading
+import time
+
+from ast import literal_eval
+from collections import OrderedDict
+
+logger = logging.getLogger()
+
+
+class ResolutionCache:
+    """
+    Memoizes what "$ENV" and "%conf.path%" references resolve to.
+
+    Environment values are cached by their raw string, so changing a variable
+    needs no invalidation: its new value is simply another key. Values which
+    literal_eval() turns into mutable containers are parsed on every call, so
+    services never share them. Configuration values are cached by path and
+    must be invalidated whenever the app conf changes.
+
+    Hit and miss counters are kept per kind of reference.
+    """
+
+    MAX_LITERALS = 1024
+
+    def __init__(self):
+        self._literals = {}
+        self._conf = {}
+        self._counters = {'env': [0, 0], 'conf': [0, 0]}
+
+    def literal(self, string: str):
+        """The Python literal in the string, or the string itself."""
+        try:
+            value = self._literals[string]
+            self._counters['env'][0] += 1
+
+            return value
+        except KeyError:
+            self._counters['env'][1] += 1
+
+        try:
+            value = literal_eval(string)
+        except (SyntaxError, ValueError):
+            value = string
+
+        if not isinstance(value, (list, dict, set)):
+            if self.MAX_LITERALS <= len(self._literals):
+                self._literals.clear()
+
+            self._literals[string] = value
+
+        return value
+
+    def conf(self, path: str, resolve: callable):
+        """The configuration value at the path, resolving it on misses."""
+        try:
+            value = self._conf[path]
+            self._counters['conf'][0] += 1
+
+            return value
+        except KeyError:
+            self._counters['conf'][1] += 1
+
+        value = self._conf[path] = resolve(path)
+
+        return value
+
+    def invalidate(self):
+        self._literals.clear()
+        self._conf.clear()
+
+    def stats(self) -> dict:
+        return {kind: {'hits': hits, 'misses': misses}
+                for kind, (hits, misses) in self._counters.items()}
+
+
+class MemoCache:
+    """
+    A bounded LRU cache of built services, by key, whose entries also expire
+    ttl seconds after being built, if given. on_evict(key, value) is called
+    for every entry leaving the cache, whether evicted, expired or cleared.
+    """
+
+    def __init__(self, max_size: int = 128, ttl: float = None, on_evict: callable = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._entries = OrderedDict()  # key: (value, built at)
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+
+    def get(self, key, build: callable) -> tuple:
+        """The value cached for the key, built on misses, and whether it was a hit."""
+        hit, value = self._lookup(key)
+
+        if hit:
+            return value, True
+
+        return self._store(key, build()), False
+
+    async def aget(self, key, build: callable) -> tuple:
+        """Like get(), awaiting what build() returns on misses."""
+        hit, value = self._lookup(key)
+
+        if hit:
+            return value, True
+
+        return self._store(key, await build()), False
+
+    def _lookup(self, key) -> tuple:
+        with self._lock:
+            entry = self._entries.get(key)
+            expired = entry is not None and self.ttl is not None and entry[1] + self.ttl <= time.monotonic()
+
+            if entry is not None and not expired:
+                self._entries.move_to_end(key)
+                self._counters['hits'] += 1
+
+                return True, entry[0]
+
+            if expired:
+                del self._entries[key]
+                self._counters['expirations'] += 1
+
+            self._counters['misses'] += 1
+
+        if expired:
+            self._evicted(key, entry[0])
+
+        return False, None
+
+    def _store(self, key, value: any):
+        evicted = []
+
+        with self._lock:
+            if key in self._entries:
+                # Built concurrently by another thread: keep the first one.
+                evicted.append((key, value))
+                value = self._entries[key][0]
+            else:
+                self._entries[key] = (value, time.monotonic())
+
+                while self.max_size < len(self._entries):
+                    old_key, (old_value, _) = self._entries.popitem(last=False)
+                    evicted.append((old_key, old_value))
+                    self._counters['evictions'] += 1
+
+        for evicted_key, evicted_value in evicted:
+            self._evicted(evicted_key, evicted_value)
+
+        return value
+
+    def _evicted(self, key, value):
+        if self.on_evict is not None:
+            try:
+                self.on_evict(key, value)
+            except Exception as e:
+                logger.warning('Could not dispose of the evicted %r: %r', key, e)
+
+    def after_fork(self, keep_entries: bool = True):
+        """
+        Resets the cache in a forked child, where the thread holding its lock
+        doesn't exist. Entries not kept are dropped without calling on_evict:
+        they belong to the parent.
+        """
+        self._lock = threading.Lock()
+
+        if not keep_entries:
+            self._entries = OrderedDict()
+
+    def clear(self):
+        with self._lock:
+            entries, self._entries = self._entries, OrderedDict()
+
+        for key, (value, _) in entries.items():
+            self._evicted(key, value)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._counters['hits'] + self._counters['misses']
+
+            return dict(self._counters, size=len(self._entries), max_size=self.max_size,
+                        hit_rate=self._counters['hits'] / lookups if lookups else 0.0)
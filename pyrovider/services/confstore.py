@@ -0,0 +1,198 @@
+"""
+A read-only app conf store, memory-mapped so that worker processes share a
+single copy of it in the page cache instead of each holding its own dicts.
+
+The store is a file holding every node of the conf under its full path,
+sorted so lookups are binary searches over the mapped file: only the values
+actually looked up are deserialized, and copied into the process.
+"""
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+
+from collections.abc import Mapping
+from typing import List, Optional
+
+from pyrovider.tools.dicttools import PathAccessor
+
+from .snapshot import is_fresh, source_fingerprint
+
+MAGIC = b'PYRVCONF'
+STORE_VERSION = 1
+
+_PREAMBLE = struct.Struct('<8sIQ')  # magic, version, header length
+_TABLE = struct.Struct('<QQ')  # number of records, offset of the first one
+_RECORD = struct.Struct('<QIQIB')  # key offset, key length, value offset, value length, kind
+
+_LEAF = 0
+_MAPPING = 1
+_SEPARATOR = b'\x00'
+
+
+def _key(parts: list) -> bytes:
+    return _SEPARATOR.join(str(p).encode('utf-8') for p in parts)
+
+
+def _nodes(node: any, parts: tuple):
+    """Every (path, kind, value) of the conf, mappings holding their keys."""
+    if isinstance(node, dict):
+        yield parts, _MAPPING, list(node)
+
+        for k, v in node.items():
+            yield from _nodes(v, parts + (k,))
+    else:
+        yield parts, _LEAF, node
+
+
+def write_conf_store(path: str, app_conf: dict, source_paths: List[str] = (), fingerprints: List[dict] = None):
+    """
+    Writes the app conf to a store file, replacing it atomically. The store
+    is only opened by open_conf_store() while the given source files don't
+    change; pass their fingerprints if taken before reading them.
+    """
+    header = pickle.dumps({'sources': fingerprints or [source_fingerprint(p) for p in source_paths]},
+                          protocol=pickle.HIGHEST_PROTOCOL)
+    nodes = sorted(((_key(parts), kind, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+                    for parts, kind, value in _nodes(app_conf or {}, ())), key=lambda n: n[0])
+    table_offset = _PREAMBLE.size + len(header) + _TABLE.size
+    data_offset = table_offset + _RECORD.size * len(nodes)
+    records, blobs = [], []
+
+    for key, kind, value in nodes:
+        records.append(_RECORD.pack(data_offset, len(key), data_offset + len(key), len(value), kind))
+        blobs += [key, value]
+        data_offset += len(key) + len(value)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.pyrovider-conf-')
+
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            fp.write(_PREAMBLE.pack(MAGIC, STORE_VERSION, len(header)))
+            fp.write(header)
+            fp.write(_TABLE.pack(len(nodes), table_offset))
+            fp.writelines(records)
+            fp.writelines(blobs)
+
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def open_conf_store(path: str, source_paths: List[str] = None) -> Optional['MappedConf']:
+    """
+    The store at the path, or None if there is none, or it is not fresh for
+    the given source files (when given).
+    """
+    try:
+        store = MappedConf(path)
+    except (OSError, ValueError, EOFError, pickle.UnpicklingError, struct.error):
+        return None
+
+    if source_paths is not None and (
+            [f['path'] for f in store.sources] != [os.path.abspath(p) for p in source_paths]
+            or not all(is_fresh(f) for f in store.sources)):
+        store.close()
+
+        return None
+
+    return store
+
+
+class MappedConf(Mapping):
+    """
+    A read-only app conf backed by a memory-mapped store file, usable as the
+    app conf of a ServiceProvider: "%path%" references are looked up in the
+    file directly. Looking up a mapping returns a plain dict copy of it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(path, 'rb') as fp:
+            self._mmap = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, version, header_length = _PREAMBLE.unpack_from(self._mmap, 0)
+
+            if MAGIC != magic or STORE_VERSION != version:
+                raise ValueError(f'"{path}" is not a conf store of version {STORE_VERSION}.')
+
+            self.sources = pickle.loads(self._mmap[_PREAMBLE.size:_PREAMBLE.size + header_length])['sources']
+            self._count, self._table = _TABLE.unpack_from(self._mmap, _PREAMBLE.size + header_length)
+        except BaseException:
+            self._mmap.close()
+            raise
+
+    def _find(self, key: bytes) -> Optional[tuple]:
+        """The (kind, value offset, value length) of the node with the key."""
+        low, high = 0, self._count
+
+        while low < high:
+            middle = (low + high) // 2
+            key_offset, key_length, value_offset, value_length, kind = \
+                _RECORD.unpack_from(self._mmap, self._table + middle * _RECORD.size)
+            found = self._mmap[key_offset:key_offset + key_length]
+
+            if found == key:
+                return kind, value_offset, value_length
+            elif found < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        return None
+
+    def _load(self, key: bytes, node: tuple) -> any:
+        kind, offset, length = node
+        value = pickle.loads(self._mmap[offset:offset + length])
+
+        if _LEAF == kind:
+            return value
+
+        prefix = key + _SEPARATOR if key else key
+
+        return {k: self._load(prefix + _key([k]), self._find(prefix + _key([k]))) for k in value}
+
+    def lookup(self, parts: list) -> any:
+        """
+        The value at the path, as dictpath() would find it in the app conf:
+        paths going past a mapping continue into the value stored there, and
+        may index lists. Raises a KeyError with the first part of the path
+        not found.
+        """
+        key = _key(parts)
+        node = self._find(key)
+
+        if node is not None:
+            return self._load(key, node)
+
+        for i, part in enumerate(parts):
+            key = _key(parts[:i + 1])
+            node = self._find(key)
+
+            if node is None:
+                raise KeyError(part)
+
+            if _LEAF == node[0]:
+                return PathAccessor(parts[i + 1:])(self._load(key, node))
+
+    def __getitem__(self, key):
+        return self.lookup([key])
+
+    def __iter__(self):
+        return iter(self._root_keys())
+
+    def __len__(self):
+        return len(self._root_keys())
+
+    def _root_keys(self) -> list:
+        _, offset, length = self._find(b'')
+
+        return pickle.loads(self._mmap[offset:offset + length])
+
+    def close(self):
+        self._mmap.close()
@@ -0,0 +1,165 @@
+from contextvars import ContextVar
+from weakref import WeakKeyDictionary, ref
+
+
+class ContextRegistry:
+    """
+    Values by owner in the current context, all in a single variable: a
+    Context holds on to every variable set in it, with its value, so one per
+    owner would pile up. The mapping is copied on write, since the contexts
+    of the tasks created from this one share it.
+
+    With weak, the owners are weak references, and the entries of those gone
+    are dropped on the next write.
+    """
+
+    __slots__ = ('_var', '_weak')
+
+    def __init__(self, name: str, weak: bool = False):
+        self._var = ContextVar(name, default=None)
+        self._weak = weak
+
+    def get(self, owner, default=None):
+        values = self._var.get()
+
+        return default if values is None else values.get(owner, default)
+
+    def set(self, owner, value):
+        values = self._copy(owner)
+        values[owner] = value
+        self._var.set(values)
+
+    def pop(self, owner, default=None):
+        values = self._var.get()
+
+        if values is None or owner not in values:
+            return default
+
+        value = values[owner]
+        self._var.set(self._copy(owner) or None)
+
+        return value
+
+    def _copy(self, owner) -> dict:
+        """The entries of the other owners."""
+        values = self._var.get()
+
+        if values is None:
+            return {}
+
+        return {o: v for o, v in values.items() if o is not owner and not (self._weak and o() is None)}
+
+
+# The key of the state of every backend in the current context; the backend
+# keeps its states by weak reference to their keys, so they go with the
+# context or the backend.
+_keys = ContextRegistry('pyrovider_context_keys', weak=True)
+
+
+class _StateKey:
+
+    __slots__ = ('__weakref__',)
+
+
+class ContextState:
+    """
+    The per-context stores of a service provider.
+    """
+
+    __slots__ = ('set_services', 'service_instances', 'service_classes', 'factory_classes',
+                 'scoped_services')
+
+    def __init__(self):
+        self.set_services = {}
+        self.service_instances = {}
+        self.service_classes = {}
+        self.factory_classes = {}
+        self.scoped_services = {}
+
+
+class ContextBackend:
+    """
+    Where a service provider keeps its ContextState.
+    """
+
+    def state(self) -> ContextState:
+        """The state of the current context, created on first use."""
+        raise NotImplementedError()
+
+    def bind(self, state: ContextState):
+        """Makes the given state the one of the current context."""
+        raise NotImplementedError()
+
+    def release(self):
+        """Drops the state of the current context."""
+        raise NotImplementedError()
+
+
+class ContextVarBackend(ContextBackend):
+    """
+    Keeps the state in a ContextVar: threads and asyncio tasks each get their
+    own, tasks inheriting the state of the context they were created from.
+
+    The states are kept by the backend, so those of a provider dropped
+    without reset() go with it, and those of a context go with it.
+    """
+
+    def __init__(self):
+        self._ref = ref(self)
+        self._states = WeakKeyDictionary()
+
+    def state(self) -> ContextState:
+        key = _keys.get(self._ref)
+
+        if key is not None:
+            # What self._states.get(key) does, without making a weak reference each time.
+            state = self._states.data.get(key[1])
+
+            if state is not None:
+                return state
+
+        state = ContextState()
+        self.bind(state)
+
+        return state
+
+    def bind(self, state: ContextState):
+        key = _StateKey()
+        self._states[key] = state
+        _keys.set(self._ref, (key, ref(key)))
+
+    def release(self):
+        _keys.pop(self._ref)
+
+
+class LocalBackend(ContextBackend):
+    """
+    Keeps the state in a werkzeug Local, as providers used to.
+    Requires werkzeug to be installed.
+
+    A Local keeps its values for as long as the context lives, so providers
+    using it must be reset() before being dropped.
+    """
+
+    def __init__(self):
+        try:
+            from werkzeug import Local, release_local
+        except ImportError:
+            from werkzeug.local import Local, release_local
+
+        self._local = Local()
+        self._release_local = release_local
+
+    def state(self) -> ContextState:
+        try:
+            return self._local.state
+        except AttributeError:
+            self._local.state = ContextState()
+
+            return self._local.state
+
+    def bind(self, state: ContextState):
+        self._local.state = state
+
+    def release(self):
+        self._release_local(self._local)
@@ -1,28 +1,93 @@
+import logging
 import yaml
 import os
 
-from typing import Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
 
-from .provider import ServiceProvider
+from .confstore import open_conf_store, write_conf_store
+from .provider import ServiceProvider, namespace_tree
+from .reload import SourcesReloader
+from .snapshot import load_snapshot, save_snapshot, source_fingerprint
 
+logger = logging.getLogger()
 
-def service_provider_from_yaml(service_conf_path: str, *providers, app_conf_path: str = None):
+# The libyaml bindings are much faster, when PyYAML was built with them.
+YamlLoader = getattr(yaml, 'CFullLoader', yaml.FullLoader)
+
+
+def parse_yaml(path: str):
+    with open(path, 'r') as fp:
+        return yaml.load(fp, Loader=YamlLoader)
+
+
+def service_provider_from_yaml(service_conf_path: str, *providers, app_conf_path: str = None,
+                               snapshot_path: str = None, app_conf_store_path: str = None):
+    """
+    Builds a service provider from a service conf file and, optionally, an
+    app conf file. With a snapshot path, the parsed confs are cached there,
+    see pyrovider.services.snapshot.
+
+    With an app conf store path, the app conf is written to a store there and
+    memory-mapped, so that processes share it, see pyrovider.services.confstore.
+    """
     provider = ServiceProvider(*providers)
+    app_conf = None
 
-    with open(service_conf_path, 'r') as fp:
-        service_conf = yaml.full_load(fp.read())
+    if app_conf_path is not None and app_conf_store_path is not None:
+        app_conf = _load_conf_store(app_conf_path, app_conf_store_path)
+        app_conf_path = None
 
-    if app_conf_path is not None:
-        with open(app_conf_path, 'r') as fp:
-            app_conf = yaml.full_load(fp.read())
-    else:
-        app_conf = None
+    source_paths = [service_conf_path] + ([app_conf_path] if app_conf_path is not None else [])
+
+    def parse():
+        return parse_yaml(service_conf_path), parse_yaml(app_conf_path) if app_conf_path is not None else None
 
-    provider.conf(service_conf, app_conf)
+    data = _load_confs(parse, source_paths, snapshot_path)
+    provider.conf(data['service_conf'], app_conf or data['app_conf'], tree=data['tree'])
 
     return provider
 
 
+def _load_conf_store(app_conf_path: str, store_path: str):
+    """The store of the app conf, written again first if not fresh."""
+    store = open_conf_store(store_path, [app_conf_path])
+
+    if store is None:
+        fingerprints = [source_fingerprint(app_conf_path)]
+        write_conf_store(store_path, parse_yaml(app_conf_path), fingerprints=fingerprints)
+        store = open_conf_store(store_path)
+
+    return store
+
+
+def _load_confs(parse: callable, source_paths: List[str], snapshot_path: str = None, key: any = None) -> dict:
+    """
+    The confs returned by parse, along with the namespace tree of the service
+    conf, read from the snapshot when it is still fresh and saved to it if not.
+    """
+    if snapshot_path is not None:
+        data = load_snapshot(snapshot_path, source_paths, key)
+
+        if data is not None:
+            return data
+
+        fingerprints = [source_fingerprint(p) for p in source_paths]
+
+    service_conf, app_conf = parse()
+    data = {'service_conf': service_conf,
+            'app_conf': app_conf,
+            'tree': namespace_tree(service_conf.keys())}
+
+    if snapshot_path is not None:
+        try:
+            save_snapshot(snapshot_path, source_paths, data, key, fingerprints=fingerprints)
+        except (OSError, TypeError, AttributeError) as e:
+            logger.warning('Could not save the service conf snapshot "%s": %r', snapshot_path, e)
+
+    return data
+
+
 class ServiceDefinitionSource:
 
     def __init__(self, name, path, as_namespace=True):
@@ -33,7 +98,10 @@ class ServiceDefinitionSource:
 
 def service_provider_from_sources(
     *sources: ServiceDefinitionSource,
-    create_alt_names_for_dashes=True
+    create_alt_names_for_dashes=True,
+    snapshot_path: str = None,
+    max_workers: int = None,
+    watch_interval: float = None
 ):
     """
     Builds a service provider from multiple sources
@@ -45,44 +113,73 @@ def service_provider_from_sources(
                   we will create a new one with underscores os if needed it
                   can be accessed as a namespace attribute
 
+      snapshot_path: Where to cache the merged service conf, so it isn't
+                  parsed again while the sources don't change
+
+      max_workers: Parse the sources on a pool of this many processes; they
+                  are still merged in the order given
+
+      watch_interval: Check the sources for changes every this many seconds,
+                  reconfiguring the provider when they do; its reloader
+                  attribute is the SourcesReloader doing it
+
     """
     provider = ServiceProvider()
 
-    merged_conf = {}
-    errors = []
-
     for source in sources:
         if not isinstance(source, ServiceDefinitionSource):
             raise TypeError(f"source must be a {ServiceDefinitionSource.__name__} instance")
 
-        with open(source.path, 'r') as fp:
-            service_conf = yaml.full_load(fp.read())
+    key = (create_alt_names_for_dashes, [(s.name, s.as_namespace) for s in sources])
+    data = _load_confs(lambda: (_merge_sources(sources, create_alt_names_for_dashes, max_workers), None),
+                       [s.path for s in sources], snapshot_path, key)
+    provider.conf(data['service_conf'], tree=data['tree'])
 
-            for key, value in service_conf.items():
-                service_key = f"{source.name}.{key}" if source.as_namespace else key
-                alt_service_key = None
+    if watch_interval is not None:
+        provider.reloader = SourcesReloader(provider, [s.path for s in sources],
+                                            lambda: _merge_sources(sources, create_alt_names_for_dashes),
+                                            interval=watch_interval)
+        provider.reloader.start()
 
-                # If there was an entry name with dashes
-                # we create an alternate name with dashboards so
-                # it's a valid python attribute name and can be accessed
-                # with dot notation
-                if create_alt_names_for_dashes and '-' in service_key:
-                    alt_service_key = service_key.replace('-', '_')
+    return provider
 
-                if service_key in merged_conf or alt_service_key in merged_conf:
-                    errors.append(
-                        f"Duplicated entry {key} from source {name} ({source.path})"
-                    )
 
-                merged_conf[service_key] = value
+def _merge_sources(sources: Tuple[ServiceDefinitionSource], create_alt_names_for_dashes: bool,
+                   max_workers: int = None) -> dict:
+    paths = [source.path for source in sources]
 
-                if alt_service_key:
-                    merged_conf[alt_service_key] = value
+    if max_workers and 1 < len(paths):
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            service_confs = list(executor.map(parse_yaml, paths))
+    else:
+        service_confs = [parse_yaml(path) for path in paths]
 
-    if errors:
-        raise ValueError("\n".join(errors))
+    merged_conf = {}
+    errors = []
 
-    provider.conf(merged_conf)
+    for source, service_conf in zip(sources, service_confs):
+        for key, value in (service_conf or {}).items():
+            service_key = f"{source.name}.{key}" if source.as_namespace else key
+            alt_service_key = None
 
-    return provider
+            # If there was an entry name with dashes
+            # we create an alternate name with dashboards so
+            # it's a valid python attribute name and can be accessed
+            # with dot notation
+            if create_alt_names_for_dashes and '-' in service_key:
+                alt_service_key = service_key.replace('-', '_')
+
+            if service_key in merged_conf or alt_service_key in merged_conf:
+                errors.append(
+                    f"Duplicated entry {key} from source {source.name} ({source.path})"
+                )
+
+            merged_conf[service_key] = value
+
+            if alt_service_key:
+                merged_conf[alt_service_key] = value
+
+    if errors:
+        raise ValueError("\n".join(errors))
 
+    return merged_conf
@@ -0,0 +1,25 @@
+"""
+Resetting service providers in forked child processes.
+
+Providers register here when created. In the child of an os.fork(), each
+live provider drops its services which are not fork-safe, so they are built
+again in the child, while the others stay shared with the parent through
+copy-on-write.
+"""
+import os
+import weakref
+
+_providers = weakref.WeakSet()
+
+
+def register(provider):
+    _providers.add(provider)
+
+
+def after_fork_in_child():
+    for provider in list(_providers):
+        provider._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=after_fork_in_child)
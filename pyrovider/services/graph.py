@@ -0,0 +1,109 @@
+from typing import Dict, Iterable, List, Set
+
+
+class DependencyGraph:
+    """
+    Directed graph of services pointing at the services they depend on.
+    """
+
+    def __init__(self, edges: Dict[str, Iterable[str]] = None):
+        self._edges = {}
+
+        for name, dependencies in (edges or {}).items():
+            self.add(name, dependencies)
+
+    def add(self, name: str, dependencies: Iterable[str] = ()):
+        self._edges.setdefault(name, [])
+
+        for dependency in dependencies:
+            if dependency not in self._edges[name]:
+                self._edges[name].append(dependency)
+
+    def __contains__(self, name: str):
+        return name in self._edges
+
+    def __iter__(self):
+        return iter(self._edges)
+
+    def dependencies(self, name: str) -> List[str]:
+        """Direct dependencies of a service which are nodes of this graph."""
+        return [d for d in self._edges.get(name, []) if d in self._edges]
+
+    def dependents(self, names: Iterable[str]) -> Set[str]:
+        """All the services depending, directly or not, on any of the given ones."""
+        reverse = {}
+
+        for name in self._edges:
+            for dependency in self.dependencies(name):
+                reverse.setdefault(dependency, []).append(name)
+
+        found = set()
+        pending = list(names)
+
+        while pending:
+            for dependent in reverse.get(pending.pop(), []):
+                if dependent not in found:
+                    found.add(dependent)
+                    pending.append(dependent)
+
+        return found
+
+    def cycles(self) -> List[List[str]]:
+        """
+        Finds the dependency cycles, each one as the list of services in it,
+        with the first one repeated at the end.
+        """
+        cycles = []
+        done = set()
+
+        for root in self._edges:
+            if root in done:
+                continue
+
+            path = [root]
+            on_path = {root}
+            stack = [iter(self.dependencies(root))]
+
+            while stack:
+                dependency = next(stack[-1], None)
+
+                if dependency is None:
+                    stack.pop()
+                    finished = path.pop()
+                    on_path.discard(finished)
+                    done.add(finished)
+                    continue
+
+                if dependency in on_path:
+                    cycles.append(path[path.index(dependency):] + [dependency])
+                elif dependency not in done:
+                    path.append(dependency)
+                    on_path.add(dependency)
+                    stack.append(iter(self.dependencies(dependency)))
+
+        return cycles
+
+    def levels(self) -> List[List[str]]:
+        """
+        Groups services in topological order: every service depends only on
+        services from previous levels, so the ones in a level are independent.
+        Services in cycles are left out.
+        """
+        pending = {name: set(self.dependencies(name)) for name in self._edges}
+        levels = []
+
+        while pending:
+            level = [name for name, dependencies in pending.items() if not dependencies]
+
+            if not level:
+                break
+
+            for name in level:
+                del pending[name]
+
+            for dependencies in pending.values():
+                dependencies.difference_update(level)
+
+            levels.append(level)
+
+        return levels
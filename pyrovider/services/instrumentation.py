@@ -0,0 +1,147 @@
+import threading
+
+from .context import ContextRegistry
+
+# The frames of every StatsCollector, by collector. A collector's entry only
+# exists while it's resolving services.
+_frames = ContextRegistry('pyrovider_stats_frames')
+
+
+class Instrument:
+    """
+    Hooks called by a ServiceProvider while it resolves services.
+    Override the ones you need; they should be quick and never raise.
+    """
+
+    def resolution_started(self, provider, name: str):
+        pass
+
+    def resolution_finished(self, provider, name: str, method: str, elapsed: float,
+                            error: Exception = None):
+        """
+        The method is how the service was obtained: "set", "instance", "class"
+        or "factory". The elapsed time, in seconds, includes dependencies.
+        """
+        pass
+
+    def cache_hit(self, provider, name: str, scope: str):
+        pass
+
+    def cache_miss(self, provider, name: str, scope: str):
+        pass
+
+    def teardown_finished(self, provider, disposed: int, errors: list, elapsed: float):
+        """
+        Called once reset() disposed of the context-scoped services, with how
+        many it disposed of, the (name, error) pairs of those which failed
+        and how long it took, in seconds.
+        """
+        pass
+
+
+class ServiceStats:
+
+    MAX_PATHS = 10
+
+    __slots__ = ('name', 'method', 'count', 'errors', 'total_time', 'self_time', 'max_time',
+                 'cache_hits', 'cache_misses', 'paths')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.method = None
+        self.count = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.self_time = 0.0
+        self.max_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.paths = []
+
+    def as_dict(self) -> dict:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+
+class StatsCollector(Instrument):
+    """
+    Records, per service, how many times it was resolved and how long it took:
+    cumulative, maximum, and excluding the time spent on its dependencies.
+    Also records the first distinct dependency paths leading to it, e.g.
+    ("app", "db-pool") for a service resolved while building "db-pool".
+    """
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _service(self, name: str) -> ServiceStats:
+        try:
+            return self._stats[name]
+        except KeyError:
+            with self._lock:
+                return self._stats.setdefault(name, ServiceStats(name))
+
+    def resolution_started(self, provider, name: str):
+        # Every frame is [name, time spent on dependencies].
+        _frames.set(self, _frames.get(self, ()) + ([self._qualify(provider, name), 0.0],))
+
+    def resolution_finished(self, provider, name: str, method: str, elapsed: float,
+                            error: Exception = None):
+        stack = _frames.get(self)
+
+        if not stack:
+            # Added while the service was being resolved.
+            return
+
+        frame, parents = stack[-1], stack[:-1]
+
+        if parents:
+            _frames.set(self, parents)
+            parents[-1][1] += elapsed
+        else:
+            _frames.pop(self)
+
+        stats = self._service(frame[0])
+
+        with self._lock:
+            stats.method = method
+            stats.count += 1
+            stats.errors += error is not None
+            stats.total_time += elapsed
+            stats.self_time += elapsed - frame[1]
+            stats.max_time = max(stats.max_time, elapsed)
+            path = tuple(f[0] for f in parents)
+
+            if path and path not in stats.paths and len(stats.paths) < stats.MAX_PATHS:
+                stats.paths.append(path)
+
+    def cache_hit(self, provider, name: str, scope: str):
+        self._service(self._qualify(provider, name)).cache_hits += 1
+
+    def cache_miss(self, provider, name: str, scope: str):
+        self._service(self._qualify(provider, name)).cache_misses += 1
+
+    @staticmethod
+    def _qualify(provider, name: str) -> str:
+        return name if getattr(provider, 'name', None) is None else f"{provider.name}.{name}"
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {name: stats.as_dict() for name, stats in self._stats.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+    def dump(self, sort_by: str = 'total_time', limit: int = 20) -> str:
+        """A table of the services with the highest values for the given stat."""
+        rows = sorted(self.stats().values(), key=lambda s: s[sort_by], reverse=True)[:limit]
+        lines = [f"{'service':<40} {'method':<8} {'count':>8} {'errors':>6} "
+                 f"{'total ms':>10} {'self ms':>10} {'max ms':>10}"]
+
+        for s in rows:
+            lines.append(f"{s['name']:<40} {s['method'] or '':<8} {s['count']:>8} {s['errors']:>6} "
+                         f"{s['total_time'] * 1e3:>10.3f} {s['self_time'] * 1e3:>10.3f} "
+                         f"{s['max_time'] * 1e3:>10.3f}")
+
+        return "\n".join(lines)
@@ -0,0 +1,195 @@
+"""
+WSGI and ASGI middleware running every request in a context of its own of a
+ServiceProvider, so context-scoped services live as long as the request and
+are disposed of once it ends, see ServiceProvider.reset().
+
+How long resolving services took within the request is sent in a response
+header, and logged along with the teardown of the request's services.
+"""
+import logging
+import time
+
+from .context import ContextRegistry
+from .instrumentation import Instrument
+
+logger = logging.getLogger()
+
+TIMING_HEADER = 'X-DI-Time'
+
+# The (timing, resolution depth) of the request of every RequestTimer, by
+# timer. Entries only last the request.
+_requests = ContextRegistry('pyrovider_request_timings')
+
+
+class RequestTiming:
+    """The time spent resolving services within a request, in seconds."""
+
+    __slots__ = ('elapsed', 'resolutions', 'started_at')
+
+    def __init__(self):
+        self.elapsed = 0.0
+        self.resolutions = 0
+        self.started_at = time.perf_counter()
+
+    @property
+    def header_value(self) -> str:
+        return f"{self.elapsed * 1e3:.3f}"
+
+
+class RequestTimer(Instrument):
+    """
+    Sums the time spent resolving services in the current request. Only the
+    outermost resolutions count, the time of their dependencies, including
+    those of parent providers, being part of theirs.
+    """
+
+    def start(self) -> RequestTiming:
+        """Starts timing a request in the current context."""
+        timing = RequestTiming()
+        _requests.set(self, (timing, 0))
+
+        return timing
+
+    def stop(self):
+        """Stops timing the request of the current context."""
+        _requests.pop(self)
+
+    def resolution_started(self, provider, name: str):
+        request = _requests.get(self)
+
+        if request is not None:
+            _requests.set(self, (request[0], request[1] + 1))
+
+    def resolution_finished(self, provider, name: str, method: str, elapsed: float,
+                            error: Exception = None):
+        request = _requests.get(self)
+
+        if request is None:
+            return
+
+        timing, depth = request[0], request[1] - 1
+        _requests.set(self, (timing, depth))
+
+        if 0 == depth:
+            timing.elapsed += elapsed
+            timing.resolutions += 1
+
+
+class ProviderMiddleware:
+    """
+    What the WSGI and ASGI middleware share. The timing header is left out
+    if header is None; the log record is logged at the given level.
+    """
+
+    def __init__(self, app: callable, provider, header: str = TIMING_HEADER, log_level: int = logging.DEBUG):
+        self.app = app
+        self.provider = provider
+        self.header = header
+        self.log_level = log_level
+        self.timer = RequestTimer()
+        self._add_timer(provider)
+
+    def _add_timer(self, provider):
+        provider.add_instrument(self.timer)
+
+        for p in provider._providers:
+            self._add_timer(p)
+
+    def _start(self) -> RequestTiming:
+        self.provider.open_context()
+
+        return self.timer.start()
+
+    def _log(self, timing: RequestTiming, report: dict):
+        if not logger.isEnabledFor(self.log_level):
+            return
+
+        logger.log(self.log_level, 'Resolved %d services in %.3f ms, disposed of %d in %.3f ms',
+                   timing.resolutions, timing.elapsed * 1e3, report['disposed'], report['elapsed'] * 1e3,
+                   extra={'di_time': timing.elapsed,
+                          'di_resolutions': timing.resolutions,
+                          'di_teardown_time': report['elapsed'],
+                          'di_disposed': report['disposed'],
+                          'di_teardown_errors': len(report['errors']),
+                          'request_time': time.perf_counter() - timing.started_at})
+
+
+class WSGIMiddleware(ProviderMiddleware):
+    """
+    WSGI middleware: the header holds the time spent resolving services
+    until the response started, in milliseconds. The request's services are
+    disposed of once the response has been sent, and the server closes it.
+    """
+
+    def __call__(self, environ: dict, start_response: callable):
+        timing = self._start()
+
+        def start_timed_response(status, headers, exc_info=None):
+            if self.header is not None:
+                headers = list(headers) + [(self.header, timing.header_value)]
+
+            return start_response(status, headers, exc_info)
+
+        try:
+            response = self.app(environ, start_timed_response)
+        except BaseException:
+            self._finish(timing)
+            raise
+
+        return ClosingIterator(response, lambda: self._finish(timing))
+
+    def _finish(self, timing: RequestTiming):
+        self.timer.stop()
+        self._log(timing, self.provider.reset())
+
+
+class ClosingIterator:
+    """Iterates over a WSGI response, calling back once the server closed it."""
+
+    def __init__(self, response, callback: callable):
+        self._response = response
+        self._iterator = iter(response)
+        self._callback = callback
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._iterator)
+
+    def close(self):
+        try:
+            if hasattr(self._response, 'close'):
+                self._response.close()
+        finally:
+            self._callback()
+
+
+class ASGIMiddleware(ProviderMiddleware):
+    """
+    ASGI middleware for HTTP and websocket connections; lifespan events go
+    straight to the app. The header holds the time spent resolving services
+    until the response started, in milliseconds. The services are disposed
+    of with areset() when the provider has it, e.g. an AsyncServiceProvider.
+    """
+
+    async def __call__(self, scope: dict, receive: callable, send: callable):
+        if scope['type'] not in ('http', 'websocket'):
+            return await self.app(scope, receive, send)
+
+        timing = self._start()
+        header = None if self.header is None else self.header.lower().encode('latin-1')
+
+        async def send_timed(message: dict):
+            if header is not None and 'http.response.start' == message['type']:
+                message = dict(message, headers=list(message.get('headers', ()))
+                               + [(header, timing.header_value.encode('latin-1'))])
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            self.timer.stop()
+            areset = getattr(self.provider, 'areset', None)
+            self._log(timing, await areset() if areset else self.provider.reset())
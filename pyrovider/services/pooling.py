@@ -0,0 +1,153 @@
+import logging
+import threading
+import time
+
+from collections import deque
+
+logger = logging.getLogger()
+
+
+class ServicePool:
+    """
+    A bounded pool of instances of a service, for services too expensive to
+    build on every get() but not safe to share as singletons.
+
+    acquire() hands out an idle instance, or builds one while the pool holds
+    fewer than max_size, or else waits for one to be released. Instances idle
+    for longer than idle_timeout seconds are dropped on the next acquire(),
+    release() or evict_idle(). dispose(instance) is called for every instance
+    leaving the pool, whether evicted, discarded or closed.
+    """
+
+    def __init__(self, build: callable, max_size: int = 8, idle_timeout: float = None,
+                 dispose: callable = None):
+        self.build = build
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.dispose = dispose
+        self._idle = deque()  # (instance, released at), most recently released last
+        self._in_use = 0
+        self._closed = False
+        self._condition = threading.Condition(threading.Lock())
+        self._counters = {'created': 0, 'reused': 0, 'evicted': 0, 'waits': 0, 'peak': 0}
+
+    def acquire(self, timeout: float = None) -> tuple:
+        """
+        An instance, and whether it was reused. Raises TimeoutError when
+        none could be had within the timeout, in seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        evicted = []
+
+        try:
+            with self._condition:
+                evicted = self._evict_idle()
+
+                while not self._idle and self.max_size <= self._in_use:
+                    self._counters['waits'] += 1
+                    remaining = None if deadline is None else deadline - time.monotonic()
+
+                    if remaining is not None and remaining <= 0 or not self._condition.wait(remaining):
+                        raise TimeoutError()
+
+                self._in_use += 1
+                self._counters['peak'] = max(self._counters['peak'], self._in_use)
+
+                if self._idle:
+                    self._counters['reused'] += 1
+
+                    return self._idle.pop()[0], True
+        finally:
+            self._disposed(evicted)
+
+        try:
+            instance = self.build()
+        except BaseException:
+            with self._condition:
+                self._in_use -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._counters['created'] += 1
+
+        return instance, False
+
+    def release(self, instance: any, discard: bool = False):
+        """
+        Returns the instance to the pool, or drops it if discarded or if the
+        pool was closed.
+        """
+        with self._condition:
+            self._in_use -= 1
+            discard = discard or self._closed
+
+            if not discard:
+                self._idle.append((instance, time.monotonic()))
+
+            evicted = self._evict_idle()
+            self._condition.notify()
+
+        self._disposed([instance] + evicted if discard else evicted)
+
+    def evict_idle(self) -> int:
+        """Drops the instances idle for too long, returning how many."""
+        with self._condition:
+            evicted = self._evict_idle()
+
+        self._disposed(evicted)
+
+        return len(evicted)
+
+    def _evict_idle(self) -> list:
+        if self.idle_timeout is None:
+            return []
+
+        expired_at = time.monotonic() - self.idle_timeout
+        evicted = []
+
+        while self._idle and self._idle[0][1] <= expired_at:
+            evicted.append(self._idle.popleft()[0])
+
+        self._counters['evicted'] += len(evicted)
+
+        return evicted
+
+    def _disposed(self, instances: list):
+        # Called without the lock, dispose() may take its time.
+        if self.dispose is None:
+            return
+
+        for instance in instances:
+            try:
+                self.dispose(instance)
+            except Exception as e:
+                logger.warning('Could not dispose of the pooled %r: %r', instance, e)
+
+    def after_fork(self, keep_idle: bool = True):
+        """
+        Resets the pool in a forked child, where the threads holding its lock
+        or its instances don't exist. Idle instances are kept if still usable,
+        or else dropped without calling dispose(): they belong to the parent.
+        """
+        self._condition = threading.Condition(threading.Lock())
+        self._in_use = 0
+
+        if not keep_idle:
+            self._idle.clear()
+
+    def close(self):
+        """
+        Disposes of the idle instances, and of the ones in use once they are
+        released, e.g. when the service is configured again.
+        """
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, deque()
+
+        self._disposed([instance for instance, _ in idle])
+
+    def stats(self) -> dict:
+        with self._condition:
+            return dict(self._counters, max_size=self.max_size, idle=len(self._idle), in_use=self._in_use,
+                        size=len(self._idle) + self._in_use)
@@ -1,21 +1,32 @@
+import logging
 import os
+import threading
+import time
+import weakref
 
-from ast import literal_eval
+from contextlib import contextmanager
 from typing import List, Dict, Tuple
 from collections import defaultdict
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 
 from dotenv import find_dotenv, load_dotenv
 from pyrovider.meta.ioc import Importer
-from pyrovider.tools.dicttools import dictpath
-
-try:
-    from werkzeug import Local, release_local
-except:
-    from werkzeug.local import Local, release_local
+from pyrovider.services import forking
+from pyrovider.services.caching import MemoCache, ResolutionCache
+from pyrovider.services.confstore import MappedConf
+from pyrovider.services.context import ContextBackend, ContextState, ContextVarBackend
+from pyrovider.services.graph import DependencyGraph
+from pyrovider.services.instrumentation import Instrument, StatsCollector
+from pyrovider.services.pooling import ServicePool
+from pyrovider.services.proxy import LazyServiceProxy
+from pyrovider.tools.dicttools import compile_path
 
 # Loads env vars from .env file
 load_dotenv(find_dotenv())
 
+logger = logging.getLogger()
+
 
 class ServiceProviderError(Exception):
 
@@ -47,15 +58,133 @@ class BadConfPathError(ServiceProviderError):
     pass
 
 
+class UnknownScopeError(ServiceProviderError):
+
+    pass
+
+
+class CircularDependencyError(ServiceProviderError):
+
+    pass
+
+
+class InvalidServiceConfError(ServiceProviderError, ValueError):
+
+    pass
+
+
+class BadPoolConfError(ServiceProviderError):
+
+    pass
+
+
+class PoolExhaustedError(ServiceProviderError, TimeoutError):
+
+    pass
+
+
+class BadMemoizeConfError(ServiceProviderError):
+
+    pass
+
+
+class ServiceAttributeError(ServiceProviderError):
+
+    pass
+
+
 class ServiceFactory():
 
     def build(self):
         raise NotImplementedError()
 
 
-def get_services_and_namespaces(services_names: List[str], provider, parent_namespace=None):
+UNBUILT = object()
+
+
+class ServicePlan:
+    """
+    A service definition compiled by ServiceProvider.conf() into its creation
+    method and a list of argument resolvers, so get() doesn't have to interpret
+    the definition again on every call.
+
+    Argument resolvers take a single "get" callable used to fetch "@" references.
+
+    "create" is what get() calls; for cached scopes it wraps "build", the actual
+    creation method. Singleton instances are kept on the plan itself, and so is
+    the pool of pooled services, and the cache of memoized ones.
+
+    "fallback_dependencies" are the "@" references only used as the defaults
+    of "$ENV" arguments: they're only resolved when the variable isn't set,
+    so they're never built ahead of time.
+
+    "dispose" is the name of the method tearing the service down, False if it
+    must not be, or None to look for a close() or __exit__() method.
+
+    Services which aren't fork_safe are built again in forked child processes.
+    """
+
+    __slots__ = ('name', 'create', 'build', 'kind', 'target', 'args', 'named_args', 'dependencies',
+                 'named_dependencies', 'lazy_dependencies', 'conf_paths', 'imports', 'error', 'scope',
+                 'instance', 'lock', 'pool', 'memo', 'fork_safe', 'dispose', 'fallback_dependencies')
+
+    def __init__(self, name: str, create: callable, kind: str = None, target: str = None,
+                 args: list = None, named_args: list = None, dependencies: list = None,
+                 named_dependencies: dict = None, lazy_dependencies: list = None,
+                 conf_paths: list = None, imports: list = None, error: Exception = None,
+                 scope: str = 'transient', build: callable = None, fork_safe: bool = True,
+                 dispose: any = None, fallback_dependencies: list = None):
+        self.name = name
+        self.create = create
+        self.build = build or create
+        self.kind = kind
+        self.target = target
+        self.args = args or []
+        self.named_args = named_args or []
+        self.dependencies = dependencies or []
+        self.named_dependencies = named_dependencies or {}
+        self.lazy_dependencies = lazy_dependencies or []
+        self.fallback_dependencies = fallback_dependencies or []
+        self.conf_paths = conf_paths or []
+        self.imports = imports or []
+        self.error = error
+        self.scope = scope
+        self.instance = UNBUILT
+        self.lock = threading.RLock() if 'singleton' == scope else None
+        self.pool = None
+        self.memo = None
+        self.fork_safe = fork_safe
+        self.dispose = dispose
+
+    def arguments(self, get: callable) -> list:
+        return [arg(get) for arg in self.args]
+
+    def named_arguments(self, get: callable, overrides: dict) -> dict:
+        if overrides:
+            return {k: overrides.get(k, None) or arg(get) for k, arg in self.named_args}
+
+        return {k: arg(get) for k, arg in self.named_args}
+
+    def graph_dependencies(self) -> list:
+        """The "@" references it may resolve while being built, fallbacks included."""
+        return self.dependencies + self.fallback_dependencies if self.fallback_dependencies else self.dependencies
+
+    def required_dependencies(self, overrides: dict) -> list:
+        """The "@" references a build will resolve, given the named argument overrides."""
+        if not overrides:
+            return self.dependencies
+
+        overridden = [d for k, deps in self.named_dependencies.items() if overrides.get(k, None) for d in deps]
+
+        return [d for d in self.dependencies if d not in overridden]
+
+
+def namespace_tree(services_names: List[str]) -> Tuple[List[str], Dict[str, tuple]]:
+    """
+    Groups dotted service names by namespace, as plain data: the names of the
+    services at this level, and a subtree of the same shape per namespace.
+    """
     services = []
-    namespaces = {}
     namespace_map = defaultdict(list)
 
     for key in services_names:
@@ -66,43 +195,81 @@ def get_services_and_namespaces(services_names: List[str], provider, parent_name
             namespace_map[namespace].append(service_name)
         else:
             services.append(key)
-    for namespace, namespace_service_names in namespace_map.items():
+
+    return services, {namespace: namespace_tree(namespace_service_names)
+                      for namespace, namespace_service_names in namespace_map.items()}
+
+
+def get_services_and_namespaces(services_names: List[str], provider, parent_namespace=None, tree=None):
+    services, subtrees = tree or namespace_tree(services_names)
+    namespaces = {}
+
+    for namespace, subtree in subtrees.items():
         namespaces[namespace] = Namespace(
-            namespace, namespace_service_names, provider, parent=parent_namespace
+            namespace, None, provider, parent=parent_namespace, tree=subtree
         )
 
     return services, namespaces
 
 
 class Namespace:
+    """
+    A group of services sharing a dotted prefix, accessible as attributes.
+
+    Paths are computed once. Sub-namespaces are stored as plain instance
+    attributes and services get a property on a class made for the
+    namespace, so attribute access doesn't go through __getattr__.
+
+    A service whose build raises an AttributeError raises it as a
+    ServiceAttributeError, which is not one: hasattr(), and getattr() with a
+    default, raise it too instead of hiding the error. The same goes for the
+    services accessed as attributes of their provider.
+    """
 
-    def __init__(self, name, services_names, provider, parent=None):
+    def __init__(self, name, services_names, provider, parent=None, tree=None):
         self.name = name
         self.parent = parent
         self.provider = provider
+        self.path = f"{parent.path}.{name}" if parent else name
 
         services, namespaces = get_services_and_namespaces(
-            services_names, provider, parent_namespace=self
+            services_names, provider, parent_namespace=self, tree=tree
         )
         self._service_names = services
+        self._service_paths = {key: f"{self.path}.{key}" for key in services}
         self._namespaces = namespaces
+        self._bind_accessors()
+
+    def _bind_accessors(self):
+        reserved = set(self.__dict__) | _NAMESPACE_ATTRIBUTES
+
+        for key, namespace in self._namespaces.items():
+            if key not in reserved:
+                self.__dict__[key] = namespace
+
+        accessors = {key: _ServiceAccessor(path)
+                     for key, path in self._service_paths.items()
+                     if key not in reserved and key not in self._namespaces}
+
+        if accessors:
+            self.__class__ = type(Namespace.__name__, (Namespace,), accessors)
 
     def __getattr__(self, key):
         if key in self._namespaces:
             return self._namespaces[key]
 
-        elif key in self._service_names:
-            return self.get(key)
+        elif key in self._service_paths:
+            return _get_attribute(self.provider, self._service_paths[key])
 
         raise AttributeError(f"Unknown attribute or service '{key}'")
 
-    @property
-    def path(self):
-        return f"{self.parent.path}.{self.name}" if self.parent else self.name
-
     def get(self, name, **kwargs):
         return self.provider.get(f"{self.path}.{name}", **kwargs)
 
+    def get_many(self, names: List[str]) -> tuple:
+        """The services of this namespace with the given names, see ServiceProvider.get_many()."""
+        return self.provider.get_many([f"{self.path}.{name}" for name in names])
+
     def set(self, name: str, service: any):
         return self.provider.set(f"{self.path}.{name}", service)
 
@@ -115,6 +282,56 @@ class Namespace:
         return self._service_names
 
 
+_NAMESPACE_ATTRIBUTES = frozenset(dir(Namespace))
+
+
+class _ServiceAccessor:
+    """Gets a service as an attribute of its namespace, see _get_attribute()."""
+
+    __slots__ = ('path',)
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __get__(self, namespace: Namespace, owner: type = None):
+        if namespace is None:
+            return self
+
+        return _get_attribute(namespace.provider, self.path)
+
+
+def _get_attribute(provider, name: str):
+    """
+    Gets a service accessed as an attribute. An AttributeError raised while
+    building it would be taken for a missing attribute, making Python fall
+    back to Namespace.__getattr__, which would build it again, or hasattr()
+    answer False, so it's raised as a ServiceAttributeError.
+    """
+    try:
+        return provider.get(name)
+    except AttributeError as e:
+        raise ServiceAttributeError(f'Building the service "{name}" raised: {e!r}') from e
+
+
+def _call_method(method: str, key: tuple, service: any):
+    getattr(service, method)()
+
+
+def _is_positive_int(value: any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and 0 < value
+
+
+def _is_seconds(value: any) -> bool:
+    return value is None or isinstance(value, (int, float)) and not isinstance(value, bool) and 0 <= value
+
+
+def _dispose_pooled(plan: 'ServicePlan', service: any):
+    hook = ServiceProvider.dispose_hook(plan, service)
+
+    if hook is not None:
+        hook()
+
+
 class ServiceProvider:
 
     name = None
@@ -127,6 +344,24 @@ class ServiceProvider:
     NOT_A_SERVICE_FACTORY_ERRMSG = 'The factory class for the service ' \
                                    '"{}" does not have a "build" method.'
     BAD_CONF_PATH_ERRMSG = 'The path "{}" was not found in the app configuration.'
+    UNKNOWN_SCOPE_ERRMSG = 'The scope "{}" of the service "{}" is not one of: {}.'
+    CIRCULAR_DEPENDENCY_ERRMSG = 'The service "{}" depends on itself: {}.'
+    BAD_POOL_CONF_ERRMSG = 'The service "{}" can\'t be pooled: {}.'
+    NOT_POOLED_ERRMSG = 'The service "{}" is not pooled.'
+    POOL_EXHAUSTED_ERRMSG = 'No instance of the pooled service "{}" was released in time.'
+    BAD_MEMOIZE_CONF_ERRMSG = 'The service "{}" can\'t be memoized: {}.'
+    BAD_DISPOSE_CONF_ERRMSG = 'The dispose method of the service "{}" must be a method name or false, not {!r}.'
+    MISSING_DEPENDENCY_ERRMSG = 'The service "{}" depends on "{}", which is not a service we know of.'
+
+    # The options of the "pool" and "memoize" confs: how to check their values,
+    # and the error when they're wrong.
+    _conf_options = {
+        'pool': {'max_size': (_is_positive_int, "the pool size {!r} is not a positive integer"),
+                 'idle_timeout': (_is_seconds, "the idle timeout {!r} is not a number of seconds")},
+        'memoize': {'max_size': (_is_positive_int, "the cache size {!r} is not a positive integer"),
+                    'ttl': (_is_seconds, "the ttl {!r} is not a number of seconds"),
+                    'on_evict': (lambda v: v is None or isinstance(v, str), "on_evict {!r} is not the name of a method")},
+    }
 
     _service_meths = {
         'instance': '_get_service_instance',
@@ -134,10 +369,29 @@ class ServiceProvider:
         'factory': '_instance_service_with_factory'
     }
 
+    _scope_meths = {
+        'transient': None,
+        'context': '_get_context_service',
+        'singleton': '_get_singleton_service'
+    }
+
+
+    def __init__(self, *providers, name: str = None, max_workers: int = None,
+                 context: ContextBackend = None):
+        """
+        With max_workers, the dependencies of a service are built concurrently
+        on a thread pool of that size; by default they are built one by one.
 
-    def __init__(self, *providers, name: str = None):
+        The context backend holds the per-context state (set, instance and
+        context-scoped services); it defaults to a ContextVarBackend.
+
+        Providers reset themselves in the child processes of os.fork(), see
+        after_fork().
+        """
         self.name = name
+        self.max_workers = max_workers
         self._providers = providers
+        self._children = weakref.WeakSet()
         self.importer = Importer()  # Can't inject it, obviously.
         self.service_conf = {}
         self.app_conf = {}
@@ -146,33 +400,136 @@ class ServiceProvider:
         self.factory_classes = {}
         self._namespaces = {}
         self._service_names = []
-        self._local = Local()
+        self._service_name_set = set()
+        self._plans = {}
+        self._routes = {}
+        self._provider_names = {}
+        self._routes_generations = None
+        self._generation = 0
+        self._graph = DependencyGraph()
+        self._resolution_cache = ResolutionCache()
+        self._conf_lock = threading.RLock()
+        self._instruments = ()
+        self._stats_collector = None
+        self._context = context or ContextVarBackend()
+        self._worker = threading.local()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self.reloader = None
+        forking.register(self)
+
+        for p in providers:
+            p._children.add(self)
+
+    def open_context(self):
+        """
+        Starts a new context, here and in the parent providers, with none of
+        the set or context-scoped services of the current one; e.g. at the
+        start of a request. End it with reset().
+        """
+        self._context.bind(ContextState())
+
+        for p in self._providers:
+            p.open_context()
+
+    def reset(self, background: bool = False):
+        """
+        Ends the current context: its set and context-scoped services are
+        dropped, here and in the parent providers, and the latter disposed of,
+        in the reverse order of their construction, so services go before
+        their dependencies. See dispose_hook().
+
+        Returns how many services were disposed of, the errors raised doing it
+        (logged, they don't stop the teardown) and how long it took, in
+        seconds. In the background, the teardown runs on a thread and a future
+        of this is returned instead.
+        """
+        disposals = self._release()
+
+        if background:
+            return self._get_executor().submit(self._teardown, disposals)
 
-    def _init_local(self):
-        if not hasattr(self._local, 'set_services'):
-            self._local.set_services = {}
-            self._local.service_instances = {}
-            self._local.service_classes = {}
-            self._local.factory_classes = {}
+        return self._teardown(disposals)
 
-    def reset(self):
-        release_local(self._local)
+    def _release(self) -> list:
+        """Releases the current context, returning its services to dispose of, last built first."""
+        scoped_services = self._context.state().scoped_services
+        disposals = [(plan, service) for plan, service in reversed(list(scoped_services.items()))]
+        self._context.release()
 
         for p in self._providers:
-            p.reset()
+            disposals += p._release()
 
-    def conf(self, service_conf: dict, app_conf: dict = None):
-        if app_conf is None:
-            app_conf = {}
+        return disposals
 
-        self.service_conf = service_conf
-        self.app_conf = app_conf
-        self.name = service_conf.get("__name__") or self.name
+    def _teardown(self, disposals: list) -> dict:
+        start = time.perf_counter()
+        disposed = 0
+        errors = []
 
-        service_names, namespaces = get_services_and_namespaces(service_conf.keys(), self)
+        for plan, service in disposals:
+            with self._disposing(plan, errors):
+                hook = self.dispose_hook(plan, service)
 
-        self._service_names = service_names
-        self._namespaces = namespaces
+                if hook is not None:
+                    hook()
+                    disposed += 1
+
+        return self._report_teardown(disposed, errors, time.perf_counter() - start)
+
+    @contextmanager
+    def _disposing(self, plan: ServicePlan, errors: list):
+        """Logs and collects the error raised disposing of the service, if any, so the teardown goes on."""
+        try:
+            yield
+        except Exception as e:
+            logger.warning('Could not dispose of the service "%s": %r', plan.name, e)
+            errors.append((plan.name, e))
+
+    def _report_teardown(self, disposed: int, errors: list, elapsed: float) -> dict:
+        report = {'disposed': disposed, 'errors': errors, 'elapsed': elapsed}
+
+        for instrument in self._instruments:
+            instrument.teardown_finished(self, **report)
+
+        return report
+
+    @staticmethod
+    def dispose_hook(plan: ServicePlan, service: any, methods: tuple = ('close', '__exit__')) -> callable:
+        """
+        What to call to dispose of the service: the method named by the
+        "dispose" option of its conf, or else the first of the given methods
+        it has, if any. Returns None if there is none, or "dispose" is false.
+        """
+        if plan.dispose is False:
+            return None
+
+        if plan.dispose:
+            return getattr(service, plan.dispose)
+
+        for method in methods:
+            hook = getattr(service, method, None)
+
+            if callable(hook):
+                return partial(hook, None, None, None) if method in ('__exit__', '__aexit__') else hook
+
+        return None
+
+    def conf(self, service_conf: dict, app_conf: dict = None, validate: bool = False,
+             tree: tuple = None):
+        """
+        Configures the services. The namespace tree of the service names may
+        be given when already known, e.g. from a snapshot.
+
+        The app conf may be a MappedConf, to share it between processes.
+        """
+        if app_conf is None:
+            app_conf = {}
+
+        resolution_cache = ResolutionCache()
+        plans, graph = self._compile_all(service_conf, app_conf, resolution_cache)
+        self._swap_conf(service_conf, app_conf, resolution_cache, plans, graph, tree)
+        namespaces = self._namespaces
 
         errors = []
         for ns in namespaces:
@@ -186,6 +543,352 @@ class ServiceProvider:
         if errors:
             raise ValueError("\n".join(errors))
 
+        if validate:
+            self.validate()
+
+    def reconf(self, service_conf: dict, app_conf: dict = None) -> set:
+        """
+        Configures the services again, keeping what was built for the ones
+        not affected by the change: only the services added, removed, or whose
+        definition (or the app conf values they use, when a new one is given)
+        changed, and those depending on them, are rebuilt. Returns the names
+        of these services.
+
+        The services of the child providers depending on them are rebuilt
+        too, see _parent_reconfigured().
+
+        The new conf is compiled aside and swapped in at once, so get() calls
+        running meanwhile see either the old conf or the new one.
+        """
+        with self._conf_lock:
+            old_conf, old_plans, old_graph = self.service_conf, self._plans, self._graph
+            missing = object()
+            changed = {name for name in set(old_conf) | set(service_conf)
+                       if old_conf.get(name, missing) != service_conf.get(name, missing)}
+
+            if app_conf is None or app_conf is self.app_conf or app_conf == self.app_conf:
+                app_conf, resolution_cache = self.app_conf, self._resolution_cache
+            else:
+                resolution_cache = ResolutionCache()
+                changed |= self._conf_changed(old_plans, self.app_conf, app_conf)
+
+            plans, graph = self._compile_all(service_conf, app_conf, resolution_cache, old_plans, changed)
+            affected = changed | graph.dependents(changed) | old_graph.dependents(changed - set(service_conf))
+
+            if affected - changed:
+                plans, graph = self._compile_all(service_conf, app_conf, resolution_cache, old_plans, affected)
+
+            self._swap_conf(service_conf, app_conf, resolution_cache, plans, graph)
+
+        self._retire(old_plans, affected)
+        self._invalidate_children(affected)
+
+        return affected
+
+    def _conf_changed(self, plans: dict, old_app_conf: dict, new_app_conf: dict) -> set:
+        """The services using a configuration path whose value differs between the app confs."""
+        missing = object()
+        differs = {}
+
+        def lookup(path: str, app_conf: dict):
+            try:
+                return self._lookup_conf(path, app_conf=app_conf)
+            except BadConfPathError:
+                return missing
+
+        for plan in plans.values():
+            for path in plan.conf_paths:
+                if path not in differs:
+                    differs[path] = lookup(path, old_app_conf) != lookup(path, new_app_conf)
+
+        return {name for name, plan in plans.items() if any(differs[path] for path in plan.conf_paths)}
+
+    def _retire(self, plans: dict, names: set):
+        """Disposes of the memoized and pooled instances of the replaced plans of the services."""
+        for name in names:
+            plan = plans.get(name)
+
+            if plan is None:
+                continue
+
+            if plan.memo is not None:
+                plan.memo.clear()
+
+            if plan.pool is not None:
+                plan.pool.close()
+
+    def _invalidate_children(self, names: set):
+        if self.name is None:
+            return
+
+        qualified = {f"{self.name}.{name}" for name in names}
+
+        for child in list(self._children):
+            child._parent_reconfigured(qualified)
+
+    def _parent_reconfigured(self, names: set):
+        """
+        Rebuilds the services depending on the given services of a parent
+        provider, by qualified name, which were reconfigured: their plans are
+        compiled again, so what was built from the old ones, singletons and
+        context-scoped instances included, is left behind.
+        """
+        with self._conf_lock:
+            old_plans = self._plans
+            # The graph only holds the services of this provider.
+            stale = {name for name, plan in old_plans.items() if names.intersection(plan.graph_dependencies())}
+            stale |= self._graph.dependents(stale)
+
+            if stale:
+                plans, _ = self._compile_all(self.service_conf, self.app_conf, self._resolution_cache,
+                                             old_plans, stale)
+                self._plans = plans
+
+        self._retire(old_plans, stale)
+        self._invalidate_children(stale | names)
+
+    def _swap_conf(self, service_conf: dict, app_conf: dict, resolution_cache: ResolutionCache,
+                   plans: dict, graph: DependencyGraph, tree: tuple = None):
+        with self._conf_lock:
+            service_names, namespaces = get_services_and_namespaces(service_conf.keys(), self, tree=tree)
+
+            self.name = service_conf.get("__name__") or self.name
+            self.service_conf = service_conf
+            self.app_conf = app_conf
+            self._resolution_cache = resolution_cache
+            self._service_names = service_names
+            self._service_name_set = set(service_names)
+            self._namespaces = namespaces
+            self._graph = graph
+            # Last, since get() only looks at the plans.
+            self._plans = plans
+            # Tells the children their route index is stale.
+            self._generation += 1
+            self._refresh_routes()
+
+    def _generations(self) -> tuple:
+        """How many times this provider and its parents, at any depth, were configured."""
+        return (self._generation,) + tuple(g for p in self._providers for g in p._generations())
+
+    def _refresh_routes(self) -> bool:
+        """
+        Builds the route index again if a parent provider was configured since
+        it was built, returning whether it was.
+        """
+        generations = tuple(g for p in self._providers for g in p._generations())
+
+        if generations == self._routes_generations:
+            return False
+
+        routes, provider_names = self._build_routes()
+        self._routes = routes
+        self._provider_names = provider_names
+        # Last, so the index is never taken as fresh before it's replaced.
+        self._routes_generations = generations
+
+        return True
+
+    def _build_routes(self) -> tuple:
+        """
+        The index of the services of the parent providers, at any depth, by
+        qualified name (e.g. "platform.team.service"): their owning provider
+        and their name there, and the parent providers by name. The first
+        parent with a given name wins.
+        """
+        routes = {}
+        provider_names = {}
+
+        for p in self._providers:
+            if p.name is None or p.name in provider_names:
+                continue
+
+            provider_names[p.name] = p
+
+            for name in p._plans:
+                routes[f"{p.name}.{name}"] = (p, name)
+
+            p._refresh_routes()
+
+            for name, route in p._routes.items():
+                routes.setdefault(f"{p.name}.{name}", route)
+
+        return routes, provider_names
+
+    def _route(self, name: str) -> tuple:
+        """
+        The owning provider of a service of a parent provider and its name
+        there, or None. Parents may be configured after this provider, so the
+        index is built again when a qualified name is not found in it and
+        one of them was.
+        """
+        route = self._routes.get(name)
+
+        if route is None and "." in name and self._providers and self._refresh_routes():
+            route = self._routes.get(name)
+
+        return route
+
+    def _compile_all(self, service_conf: dict, app_conf: dict, resolution_cache: ResolutionCache,
+                     previous: dict = None, stale: set = ()):
+        """
+        Compiles the plans of the services and their dependency graph, reusing
+        the previous plans of the services which are not stale.
+        """
+        get_conf = partial(resolution_cache.conf, resolve=partial(self._lookup_conf, app_conf=app_conf))
+        plans = {name: previous[name] if previous and name in previous and name not in stale
+                 else self._compile(name, definition, get_conf)
+                 for name, definition in service_conf.items()}
+        graph = DependencyGraph({name: plan.graph_dependencies() for name, plan in plans.items()})
+
+        for cycle in graph.cycles():
+            error = CircularDependencyError(
+                self.CIRCULAR_DEPENDENCY_ERRMSG.format(cycle[0], " -> ".join(cycle)))
+
+            for name in cycle[:-1]:
+                if plans[name].error is None:
+                    plans[name] = self._failed_plan(name, error)
+
+        return plans, graph
+
+    def validate(self):
+        """
+        Checks every service definition, raising an InvalidServiceConfError
+        listing all the problems found: bad definitions, circular and missing
+        dependencies, and configuration paths missing from the app conf.
+        """
+        errors = []
+
+        for name, plan in self._plans.items():
+            if plan.error is not None:
+                errors.append(str(plan.error))
+                continue
+
+            for dependency in plan.graph_dependencies() + plan.lazy_dependencies:
+                if not self.has(dependency):
+                    errors.append(self.MISSING_DEPENDENCY_ERRMSG.format(name, dependency))
+
+            for path in plan.conf_paths:
+                try:
+                    self._get_conf(path)
+                except BadConfPathError as e:
+                    errors.append(f'{e} (service "{name}")')
+
+        if errors:
+            raise InvalidServiceConfError("\n".join(errors))
+
+    def has(self, name: str) -> bool:
+        """Whether the service is known to this provider or to one of its parents."""
+        if name in self._plans:
+            return True
+
+        route = self._route(name)
+
+        return route is not None and route[1] in route[0]._plans
+
+    def import_targets(self) -> List[str]:
+        """Every object path the services of this provider and its parents import."""
+        targets = []
+
+        for p in self._providers:
+            targets += p.import_targets()
+
+        for plan in self._plans.values():
+            if plan.error is None:
+                targets.append(plan.target)
+
+            targets += plan.imports
+
+        return list(dict.fromkeys(targets))
+
+    def preload(self, background: bool = False) -> threading.Thread:
+        """
+        Imports every class, factory, instance and "^" reference now, instead
+        of on the first get() needing them. See Importer.preload().
+        """
+        return self.importer.preload(self.import_targets(), background=background)
+
+    def fork_unsafe_services(self) -> set:
+        """
+        The services which can't be shared with forked child processes: those
+        marked with "fork_safe: false", and the ones depending on them, here
+        or in the parent providers (with their qualified names).
+        """
+        unsafe = {f"{p.name}.{name}" for p in self._providers for name in p.fork_unsafe_services()}
+        unsafe |= {name for name, plan in self._plans.items()
+                   if not plan.fork_safe or any(d in unsafe for d in plan.graph_dependencies())}
+
+        return unsafe | self._graph.dependents(unsafe)
+
+    def after_fork(self):
+        """
+        Drops, in a forked child process, the services which can't be shared
+        with the parent, so they are built again on their next get(), resets
+        the locks and thread pool the child can't use, and restarts the
+        reloader thread, if any.
+
+        Called automatically after os.fork(), but servers forking on their
+        own, such as uWSGI, need to call it from their post-fork hook.
+        Parent providers are reset too.
+        """
+        for p in self._providers:
+            p.after_fork()
+
+        self._after_fork()
+
+    def _after_fork(self):
+        unsafe = self.fork_unsafe_services()
+        scoped_services = self._context.state().scoped_services
+
+        for name, plan in self._plans.items():
+            if plan.lock is not None:
+                plan.lock = threading.RLock()
+
+            if plan.pool is not None:
+                plan.pool.after_fork(keep_idle=name not in unsafe)
+
+            if plan.memo is not None:
+                plan.memo.after_fork(keep_entries=name not in unsafe)
+
+            if name in unsafe:
+                plan.instance = UNBUILT
+                scoped_services.pop(plan, None)
+
+        self._conf_lock = threading.RLock()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._worker = threading.local()
+
+        if self.reloader is not None:
+            self.reloader.after_fork()
+
+    def warm(self, max_workers: int = None, fork_safe_only: bool = False):
+        """
+        Builds every singleton service ahead of time, in dependency order, so
+        the first requests don't pay for it. Parent providers are warmed first.
+
+        With max_workers, independent services are built in parallel threads.
+        With fork_safe_only, the services which would be dropped in forked
+        child processes are left for them to build, e.g. when preloading an
+        app in the master process of a prefork server.
+        """
+        for p in self._providers:
+            p.warm(max_workers=max_workers, fork_safe_only=fork_safe_only)
+
+        unsafe = self.fork_unsafe_services() if fork_safe_only else ()
+        levels = [[name for name in level if 'singleton' == self._plans[name].scope and name not in unsafe]
+                  for level in self._graph.levels()]
+        levels = [level for level in levels if level]
+
+        if not max_workers:
+            for level in levels:
+                for name in level:
+                    self.get(name)
+            return
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for level in levels:
+                list(executor.map(self.get, level))
+
     @property
     def namespaces(self):
         return list(self._namespaces.keys()) + [p.name for p in self._providers]
@@ -198,147 +901,576 @@ class ServiceProvider:
         if key in self._namespaces:
             return self._namespaces[key]
 
-        elif key in self._service_names:
-            return self.get(key)
+        elif key in self._service_name_set:
+            return _get_attribute(self, key)
 
         elif "." in key:
             # a service from a parent provider might have been requested
-            service_key = ".".join(key.split(".")[1:])
-            try:
-                for p in self._providers:
-                    return getattr(p, service_key)
+            route = self._route(key)
 
-            except AttributeError:
-                pass
+            if route is not None:
+                return _get_attribute(*route)
         else:
             # a provider might be referenced by its name
-            for p in self._providers:
-                if key == p.name:
-                    return p
+            if key not in self._provider_names and self._providers:
+                self._refresh_routes()
+
+            if key in self._provider_names:
+                return self._provider_names[key]
 
         raise AttributeError(f"Unknown attribute, service or namespace '{key}'")
 
     def get(self, name: str, **kwargs):
-        self._init_local()
+        plan = self._plans.get(name)
 
-        if name not in self.service_conf:
-            if "." in name:
-                parent = name.split(".")[0]
-                service_key = ".".join(name.split(".")[1:])
+        if plan is None:
+            route = self._route(name)
 
-                for p in self._providers:
-                    if parent == p.name:
-                        return p.get(service_key, **kwargs)
+            if route is None:
+                raise UnknownServiceError(self.UNKNOWN_SERVICE_ERRMSG.format(name))
 
-            raise UnknownServiceError(self.UNKNOWN_SERVICE_ERRMSG.format(name))
+            return route[0].get(route[1], **kwargs)
 
-        return self._get_set_service(name) or self._get_built_service(name, **kwargs)
+        if self._instruments:
+            return self._get_instrumented(name, plan, kwargs)
 
-    def _get_set_service(self, name: str):
-        if name in self._local.set_services:
-            return self._local.set_services[name]
+        return self._get_set_service(name) or plan.create(plan, self.get, kwargs)
+
+    def get_many(self, names: List[str]) -> tuple:
+        """
+        The services with the given names, in the same order, resolved as a
+        batch: a dependency shared by several of them (or required more than
+        once by one of them) is resolved only once for the whole batch, even
+        when it's transient.
+
+        With max_workers, the workers building dependencies resolve them
+        through the batch too, one at a time per name.
+        """
+        batch = {}
+
+        if self.max_workers:
+            locks = {}
+            locks_lock = threading.Lock()
 
-    def _get_built_service(self, name: str, **kwargs):
-        if self.service_conf[name] and self._has_multiple_creation_methods(name):
-            raise TooManyCreationMethodsError(self.TOO_MANY_CREATION_METHODS_ERRMSG.format(name))
+            def get(name: str):
+                try:
+                    return batch[name]
+                except KeyError:
+                    pass
 
-        for service_type, method in self._service_meths.items():
-            if self.service_conf[name] and service_type in self.service_conf[name]:
-                return getattr(self, method)(name, **kwargs)
+                with locks_lock:
+                    lock = locks.setdefault(name, threading.RLock())
+
+                with lock:
+                    return batch[name] if name in batch else resolve(name)
         else:
-            raise NoCreationMethodError(self.NO_CREATION_METHOD_ERRMSG.format(name))
+            def get(name: str):
+                try:
+                    return batch[name]
+                except KeyError:
+                    return resolve(name)
+
+        def resolve(name: str):
+            plan = self._plans.get(name)
+
+            if plan is None:
+                service = self.get(name)
+            elif self._instruments:
+                service = self._get_instrumented(name, plan, {}, get)
+            else:
+                service = self._get_set_service(name) or plan.create(plan, get, {})
 
-    def set(self, name: str, service: any):
-        self._init_local()
+            batch[name] = service
 
-        if name not in self.service_conf:
-            raise UnknownServiceError(self.UNKNOWN_SERVICE_ERRMSG.format(name))
+            return service
+
+        return tuple(get(name) for name in names)
 
-        self._local.set_services[name] = service
+    def _get_instrumented(self, name: str, plan: ServicePlan, kwargs: dict, get: callable = None):
+        # The same ones get both calls, even if instruments are added meanwhile.
+        instruments = self._instruments
 
-    def _has_multiple_creation_methods(self, name: str):
-        if not self.service_conf[name]:
-            raise NoCreationMethodError(self.NO_CREATION_METHOD_ERRMSG.format(name))
+        for instrument in instruments:
+            instrument.resolution_started(self, name)
 
-        return 1 < len([k for k in self._service_meths.keys() if k in self.service_conf[name]])
+        start = time.perf_counter()
+        method = plan.kind
+        error = None
 
-    def _get_service_instance(self, name: str):
-        if name not in self._local.service_instances:
-            self._local.service_instances[name] = self.importer.get_obj(self.service_conf[name]['instance'])
+        try:
+            service = self._get_set_service(name)
 
-        return self._local.service_instances[name]
+            if service:
+                method = 'set'
 
-    def _instance_service_with_class(self, name: str, **kwargs):
-        if name not in self._local.service_classes:
-            self._local.service_classes[name] = self.importer.get_obj(self.service_conf[name]['class'])
+                return service
 
-        return self._local.service_classes[name](*self._get_args(name), **self._get_kwargs(name, **kwargs))
+            return plan.create(plan, get or self.get, kwargs)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
 
-    def _instance_service_with_factory(self, name: str, **kwargs):
-        if name not in self._local.factory_classes:
-            factory_class = self.importer.get_obj(self.service_conf[name]['factory'])
+            for instrument in instruments:
+                instrument.resolution_finished(self, name, method, elapsed, error)
 
-            if not hasattr(factory_class, 'build') or not callable(factory_class.build):
-                raise NotAServiceFactoryError(self.NOT_A_SERVICE_FACTORY_ERRMSG.format(name))
+    def _notify_cache(self, plan: ServicePlan, hit: bool):
+        for instrument in self._instruments:
+            if hit:
+                instrument.cache_hit(self, plan.name, plan.scope)
+            else:
+                instrument.cache_miss(self, plan.name, plan.scope)
 
-            self._local.factory_classes[name] = factory_class
+    def add_instrument(self, instrument: Instrument):
+        """Calls the hooks of the instrument whenever this provider resolves a service."""
+        self._instruments = self._instruments + (instrument,)
 
-        return self._local.factory_classes[name](*self._get_args(name), **self._get_kwargs(name, **kwargs)).build()
+    def remove_instrument(self, instrument: Instrument):
+        self._instruments = tuple(i for i in self._instruments if i is not instrument)
 
-    def _get_args(self, name: str):
-        if 'arguments' in self.service_conf[name]:
-            return [self._get_arg(ref) for ref in self.service_conf[name]['arguments']]
-        else:
-            return []
+    def collect_stats(self) -> StatsCollector:
+        """Starts recording construction counts and timings per service, see stats()."""
+        if self._stats_collector is None:
+            self._stats_collector = StatsCollector()
+            self.add_instrument(self._stats_collector)
+
+        return self._stats_collector
+
+    def stats(self) -> dict:
+        """Counts and timings per service since collect_stats() was called, if it was."""
+        return self._stats_collector.stats() if self._stats_collector else {}
+
+    @contextmanager
+    def acquire(self, name: str, timeout: float = None, **kwargs):
+        """
+        Lends an instance of a pooled service for the duration of the block,
+        waiting up to timeout seconds for one to be released if the pool is
+        full. An instance is discarded instead of released if the block raises.
+
+        With overrides, a new instance is built for the block and not pooled.
+        """
+        provider, plan = self._pooled_plan(name)
+
+        if kwargs:
+            yield provider.get(plan.name, **kwargs)
+            return
+
+        try:
+            service, reused = plan.pool.acquire(timeout)
+        except TimeoutError:
+            raise PoolExhaustedError(self.POOL_EXHAUSTED_ERRMSG.format(name)) from None
+
+        if provider._instruments:
+            provider._notify_cache(plan, reused)
+
+        try:
+            yield service
+        except BaseException:
+            plan.pool.release(service, discard=True)
+            raise
+
+        plan.pool.release(service)
+
+    def _pooled_plan(self, name: str) -> tuple:
+        plan = self._plans.get(name)
+
+        if plan is None:
+            route = self._route(name)
+
+            if route is not None:
+                return route[0]._pooled_plan(route[1])
 
-    def _get_kwargs(self, name: str, **kwargs):
-        named_arguments = {}
+            raise UnknownServiceError(self.UNKNOWN_SERVICE_ERRMSG.format(name))
+
+        if plan.error is not None:
+            self._raise_plan_error(plan, self.get, {})
+
+        if plan.pool is None:
+            raise BadPoolConfError(self.NOT_POOLED_ERRMSG.format(name))
+
+        return self, plan
+
+    def evict_idle(self) -> int:
+        """
+        Drops the pooled instances idle for longer than their idle_timeout,
+        here and in the parent providers, returning how many.
+        """
+        return sum(p.evict_idle() for p in self._providers) + \
+            sum(plan.pool.evict_idle() for plan in self._plans.values() if plan.pool is not None)
+
+    def pool_stats(self) -> dict:
+        """Sizes and counters of the pool of every pooled service."""
+        return {name: plan.pool.stats() for name, plan in self._plans.items() if plan.pool is not None}
+
+    def _get_set_service(self, name: str):
+        return self._context.state().set_services.get(name)
 
-        for k, v in self.service_conf[name].get('named_arguments', {}).items():
-            named_arguments[k] = kwargs.get(k, None) or self._get_arg(v)
+    def set(self, name: str, service: any):
+        if name not in self.service_conf:
+            raise UnknownServiceError(self.UNKNOWN_SERVICE_ERRMSG.format(name))
+
+        self._context.state().set_services[name] = service
 
-        return named_arguments
+    def _compile(self, name: str, definition: dict, get_conf: callable) -> ServicePlan:
+        if not definition:
+            return self._failed_plan(name, NoCreationMethodError(self.NO_CREATION_METHOD_ERRMSG.format(name)))
 
-    def _get_arg(self, ref: any):
-        if isinstance(ref, str):
-            if '@' == ref[0]:
-                return self.get(ref[1:])
+        service_types = [k for k in self._service_meths.keys() if k in definition]
+
+        if 1 < len(service_types):
+            return self._failed_plan(name, TooManyCreationMethodsError(
+                self.TOO_MANY_CREATION_METHODS_ERRMSG.format(name)))
+        elif not service_types:
+            return self._failed_plan(name, NoCreationMethodError(self.NO_CREATION_METHOD_ERRMSG.format(name)))
+
+        service_type = service_types[0]
+        scope = definition.get('scope') or 'transient'
+
+        if scope not in self._scope_meths:
+            return self._failed_plan(name, UnknownScopeError(
+                self.UNKNOWN_SCOPE_ERRMSG.format(scope, name, ", ".join(self._scope_meths))))
+
+        build = getattr(self, self._service_meths[service_type])
+        scope_meth = self._scope_meths[scope] if 'instance' != service_type else None
+        refs = {'dependencies': [], 'lazy_dependencies': [], 'fallback_dependencies': [], 'conf_paths': [],
+                'imports': []}
+        args = [self._compile_arg(ref, refs, get_conf) for ref in definition.get('arguments') or []]
+        named_args = []
+        named_dependencies = {}
+
+        for k, v in (definition.get('named_arguments') or {}).items():
+            named_dependencies[k] = []
+            named_args.append((k, self._compile_arg(v, dict(refs, dependencies=named_dependencies[k]), get_conf)))
+            refs['dependencies'] += [d for d in named_dependencies[k] if d not in refs['dependencies']]
+
+        dispose = definition.get('dispose')
+
+        if dispose is not None and dispose is not False and not isinstance(dispose, str):
+            return self._failed_plan(name, InvalidServiceConfError(self.BAD_DISPOSE_CONF_ERRMSG.format(name, dispose)))
+
+        pool_conf = definition.get('pool')
+        memoize_conf = definition.get('memoize')
+
+        if pool_conf is not None and not isinstance(pool_conf, dict):
+            pool_conf = {'max_size': pool_conf}
+
+        if memoize_conf is True:
+            memoize_conf = {}
+        elif memoize_conf is False:
+            memoize_conf = None
+
+        for key, conf, error_class, errmsg in (
+                ('pool', pool_conf, BadPoolConfError, self.BAD_POOL_CONF_ERRMSG),
+                ('memoize', memoize_conf, BadMemoizeConfError, self.BAD_MEMOIZE_CONF_ERRMSG)):
+            error = None if conf is None else self._check_option_conf(key, conf, service_type, scope)
+
+            if error:
+                return self._failed_plan(name, error_class(errmsg.format(name, error)))
+
+        plan = ServicePlan(name,
+                           getattr(self, scope_meth) if scope_meth else build,
+                           build=build,
+                           kind=service_type,
+                           target=definition[service_type],
+                           args=args,
+                           named_args=named_args,
+                           named_dependencies=named_dependencies,
+                           scope=scope,
+                           fork_safe=definition.get('fork_safe', True) is not False,
+                           dispose=dispose,
+                           **refs)
+
+        if pool_conf is not None:
+            plan.pool = ServicePool(partial(build, plan, self.get, {}), dispose=partial(_dispose_pooled, plan),
+                                    **pool_conf)
+
+        if memoize_conf is not None:
+            memoize_conf = dict(memoize_conf)
+            on_evict = memoize_conf.pop('on_evict', None)
+            plan.memo = MemoCache(on_evict=on_evict and partial(_call_method, on_evict), **memoize_conf)
+            plan.create = partial(self._get_memoized_service, create=plan.create)
+
+        return plan
+
+    @classmethod
+    def _check_option_conf(cls, key: str, conf: any, service_type: str, scope: str) -> str:
+        """What's wrong with the "pool" or "memoize" conf of a service, if anything."""
+        if 'instance' == service_type:
+            return "instances are shared already"
+
+        if 'transient' != scope:
+            return f'it has the "{scope}" scope'
+
+        if not isinstance(conf, dict):
+            return f"{conf!r} is not true nor a mapping of options"
+
+        options = cls._conf_options[key]
+        unknown = set(conf) - set(options)
+
+        if unknown:
+            return f"unknown {key} options " + ", ".join(sorted(map(str, unknown)))
+
+        for option, (check, errmsg) in options.items():
+            if option in conf and not check(conf[option]):
+                return errmsg.format(conf[option])
+
+    def _failed_plan(self, name: str, error: ServiceProviderError) -> ServicePlan:
+        return ServicePlan(name, self._raise_plan_error, error=error)
+
+    @staticmethod
+    def _raise_plan_error(plan: ServicePlan, get: callable, overrides: dict):
+        raise type(plan.error)(*plan.error.args)
+
+    def _compile_arg(self, ref: any, refs: dict, get_conf: callable) -> callable:
+        """
+        Turns an argument reference into a resolver, collecting "@", "@?", "%"
+        and "^" references into the dependencies, lazy_dependencies,
+        conf_paths and imports lists of refs along the way; "@" references
+        in "$ENV" defaults go to fallback_dependencies instead.
+
+        "%" references are resolved with get_conf, bound to the app conf the
+        plan is compiled for.
+        """
+        if isinstance(ref, str) and ref:
+            if '@?' == ref[:2]:
+                service_name = ref[2:]
+                refs['lazy_dependencies'].append(service_name)
+
+                return lambda get: LazyServiceProxy(lambda: self.get(service_name))
+            elif '@' == ref[0]:
+                service_name = ref[1:]
+                refs['dependencies'].append(service_name)
+
+                return lambda get: get(service_name)
             elif '%' == ref[0] == ref[-1:]:
-                return self._get_conf(ref[1:-1])
+                path = ref[1:-1]
+                refs['conf_paths'].append(path)
+                compile_path(path)
+
+                return lambda get: get_conf(path)
             elif '$' == ref[0]:
-                return self._get_env(ref[1:])
+                var = ref[1:]
+
+                return lambda get: self._get_env(var)
             elif '^' == ref[0]:
-                return self.importer.get_obj(ref[1:])
+                obj_path = ref[1:]
+                refs['imports'].append(obj_path)
+
+                return lambda get: self.importer.get_obj(obj_path)
 
         elif isinstance(ref, list):
-            if '$' == ref[0][0]:
-                return self._get_env(ref[0][1:], ref[1])
+            if ref and isinstance(ref[0], str) and '$' == ref[0][:1]:
+                var = ref[0][1:]
+                default = self._compile_arg(ref[1] if 1 < len(ref) else None,
+                                            dict(refs, dependencies=refs['fallback_dependencies']), get_conf)
+
+                return lambda get: self._get_env(var, default, get)
             else:
-                return [self._get_arg(i) for i in ref]
+                items = [self._compile_arg(i, refs, get_conf) for i in ref]
 
-        return ref # Literal
+                return lambda get: [item(get) for item in items]
 
-    def _get_conf(self, path: str):
-        parts = path.split('.')
+        return lambda get: ref  # Literal
+
+    def _get_singleton_service(self, plan: ServicePlan, get: callable, overrides: dict):
+        if overrides:
+            # Overriding named arguments yields a one-off instance, never the shared one.
+            return plan.build(plan, get, overrides)
+
+        if plan.instance is UNBUILT:
+            with plan.lock:
+                if plan.instance is UNBUILT:
+                    if self._instruments:
+                        self._notify_cache(plan, False)
+
+                    plan.instance = plan.build(plan, get, overrides)
+
+                    return plan.instance
+
+        if self._instruments:
+            self._notify_cache(plan, True)
 
+        return plan.instance
+
+    def _get_memoized_service(self, plan: ServicePlan, get: callable, overrides: dict, create: callable):
+        key = self._memo_key(overrides)
+
+        if key is None:
+            return create(plan, get, overrides)
+
+        service, hit = plan.memo.get(key, partial(create, plan, get, overrides))
+
+        if self._instruments:
+            self._notify_cache(plan, hit)
+
+        return service
+
+    @staticmethod
+    def _memo_key(overrides: dict) -> tuple:
+        """The memo cache key of the overrides, None if unhashable: no caching for these."""
         try:
-            trunk = self.app_conf[parts[0]]
-        except KeyError as e:
-            raise BadConfPathError(self.BAD_CONF_PATH_ERRMSG.format(parts[0]))
+            key = tuple(sorted(overrides.items()))
+            hash(key)
+        except TypeError:
+            return None
+
+        return key
+
+    def memo_stats(self) -> dict:
+        """Hits, misses, evictions and hit rate of the cache of every memoized service."""
+        return {name: plan.memo.stats() for name, plan in self._plans.items() if plan.memo is not None}
+
+    def _get_context_service(self, plan: ServicePlan, get: callable, overrides: dict):
+        if overrides:
+            return plan.build(plan, get, overrides)
+
+        scoped_services = self._context.state().scoped_services
+
+        if self._instruments:
+            self._notify_cache(plan, plan in scoped_services)
+
+        if plan not in scoped_services:
+            scoped_services[plan] = plan.build(plan, get, overrides)
+
+        return scoped_services[plan]
+
+    def _prefetch(self, plan: ServicePlan, get: callable, overrides: dict) -> callable:
+        """
+        Builds the dependencies of a service concurrently on the thread pool,
+        returning a get callable that serves them. Workers share the caller's
+        context-local stores, and never prefetch themselves, so nested builds
+        can't starve the pool. When several dependencies fail, the error of the
+        first one in definition order is raised, once all of them finished.
+
+        Dependencies no worker started yet are built by the caller instead:
+        it may hold the lock of a singleton a busy worker is waiting for.
+        """
+        dependencies = plan.required_dependencies(overrides)
+
+        if 2 > len(dependencies) or getattr(self._worker, 'active', False):
+            return get
+
+        states = self._capture_states()
+        futures = [self._get_executor().submit(self._get_in_worker, states, d, get) for d in dependencies]
+        resolved = {}
+        error = None
+
+        for dependency, future in zip(dependencies, futures):
+            try:
+                resolved[dependency] = get(dependency) if future.cancel() else future.result()
+            except Exception as e:
+                error = error or e
+
+        if error is not None:
+            raise error
+
+        return lambda name: resolved[name] if name in resolved else get(name)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix='pyrovider')
+
+        return self._executor
+
+    def _capture_states(self) -> list:
+        """The context states of this provider and its parents, to share with workers."""
+        states = [(self, self._context.state())]
+
+        for p in self._providers:
+            states += p._capture_states()
+
+        return states
+
+    def _get_in_worker(self, states: list, name: str, get: callable = None):
+        for provider, state in states:
+            provider._context.bind(state)
+
+        self._worker.active = True
 
         try:
-            return dictpath(trunk, parts[1:])
+            return (get or self.get)(name)
+        finally:
+            self._worker.active = False
+
+            for provider, state in states:
+                provider._context.release()
+
+    def _get_service_instance(self, plan: ServicePlan, get: callable, overrides: dict):
+        service_instances = self._context.state().service_instances
+
+        if plan not in service_instances:
+            service_instances[plan] = self.importer.get_obj(plan.target)
+
+        return service_instances[plan]
+
+    def _instance_service_with_class(self, plan: ServicePlan, get: callable, overrides: dict):
+        service_classes = self._context.state().service_classes
+
+        if plan not in service_classes:
+            service_classes[plan] = self.importer.get_obj(plan.target)
+
+        if self.max_workers:
+            get = self._prefetch(plan, get, overrides)
+
+        return service_classes[plan](*plan.arguments(get), **plan.named_arguments(get, overrides))
+
+    def _instance_service_with_factory(self, plan: ServicePlan, get: callable, overrides: dict):
+        factory_classes = self._context.state().factory_classes
+
+        if plan not in factory_classes:
+            factory_class = self.importer.get_obj(plan.target)
+
+            if not hasattr(factory_class, 'build') or not callable(factory_class.build):
+                raise NotAServiceFactoryError(self.NOT_A_SERVICE_FACTORY_ERRMSG.format(plan.name))
+
+            factory_classes[plan] = factory_class
+
+        if self.max_workers:
+            get = self._prefetch(plan, get, overrides)
+
+        return factory_classes[plan](*plan.arguments(get), **plan.named_arguments(get, overrides)).build()
+
+    def invalidate_resolution_cache(self):
+        """
+        Forgets the memoized "%conf.path%" and "$ENV" values, which conf()
+        already does. Needed after changing the app conf in place.
+        """
+        self._resolution_cache.invalidate()
+
+    def resolution_cache_stats(self) -> dict:
+        """Hit and miss counters of the "$ENV" and "%conf.path%" resolution cache."""
+        return self._resolution_cache.stats()
+
+    def _get_conf(self, path: str):
+        return self._resolution_cache.conf(path, self._lookup_conf)
+
+    def _lookup_conf(self, path: str, app_conf: dict = None):
+        app_conf = self.app_conf if app_conf is None else app_conf
+        accessor = compile_path(path)
+
+        try:
+            if isinstance(app_conf, MappedConf):
+                return app_conf.lookup(accessor.parts)
+
+            return accessor(app_conf)
         except KeyError as e:
             raise BadConfPathError(self.BAD_CONF_PATH_ERRMSG.format(e.args[0]))
 
-    def _get_env(self, var: str, default: any = None):
-        default = self._get_arg(default)
-        string = os.environ.get(var, default)
+    def _get_env(self, var: str, default: callable = None, get: callable = None):
+        """
+        The environment variable parsed as a Python literal when possible;
+        the default resolver is only run when the variable isn't set.
+        """
+        string = os.environ.get(var)
 
-        try:
-            if string:
-                return literal_eval(string)
-        except SyntaxError:
-            pass
+        if string is None and default is not None:
+            string = default(get)
+
+        if string and isinstance(string, str):
+            return self._resolution_cache.literal(string)
 
         return string
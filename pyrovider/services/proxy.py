@@ -0,0 +1,97 @@
+import threading
+
+
+class LazyServiceProxy:
+    """
+    Stands in for a service until it's actually used: the service is resolved,
+    once, on first attribute access (or call, iteration, comparison...).
+
+    Injected for "@?service" references.
+    """
+
+    __slots__ = ('_resolver', '_service', '_lock', '__weakref__')
+
+    _UNRESOLVED = object()
+
+    def __init__(self, resolver: callable):
+        object.__setattr__(self, '_resolver', resolver)
+        object.__setattr__(self, '_service', self._UNRESOLVED)
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    def _resolve(self):
+        service = object.__getattribute__(self, '_service')
+
+        if service is LazyServiceProxy._UNRESOLVED:
+            with object.__getattribute__(self, '_lock'):
+                service = object.__getattribute__(self, '_service')
+
+                if service is LazyServiceProxy._UNRESOLVED:
+                    service = object.__getattribute__(self, '_resolver')()
+                    object.__setattr__(self, '_service', service)
+
+        return service
+
+    @property
+    def is_resolved(self) -> bool:
+        return object.__getattribute__(self, '_service') is not LazyServiceProxy._UNRESOLVED
+
+    @property
+    def __class__(self):
+        return type(self._resolve())
+
+    def __getattr__(self, key):
+        return getattr(self._resolve(), key)
+
+    def __setattr__(self, key, value):
+        setattr(self._resolve(), key, value)
+
+    def __delattr__(self, key):
+        delattr(self._resolve(), key)
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+    def __repr__(self):
+        if not self.is_resolved:
+            return f"<{LazyServiceProxy.__name__} (unresolved)>"
+
+        return repr(self._resolve())
+
+    def __str__(self):
+        return str(self._resolve())
+
+    def __bool__(self):
+        return bool(self._resolve())
+
+    def __eq__(self, other):
+        return self._resolve() == other
+
+    def __ne__(self, other):
+        return self._resolve() != other
+
+    def __hash__(self):
+        return hash(self._resolve())
+
+    def __len__(self):
+        return len(self._resolve())
+
+    def __iter__(self):
+        return iter(self._resolve())
+
+    def __contains__(self, item):
+        return item in self._resolve()
+
+    def __getitem__(self, key):
+        return self._resolve()[key]
+
+    def __setitem__(self, key, value):
+        self._resolve()[key] = value
+
+    def __delitem__(self, key):
+        del self._resolve()[key]
+
+    def __enter__(self):
+        return self._resolve().__enter__()
+
+    def __exit__(self, *exc_info):
+        return self._resolve().__exit__(*exc_info)
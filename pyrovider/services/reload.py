@@ -0,0 +1,101 @@
+"""
+Reloading a provider's service conf when its source files change.
+"""
+import logging
+import os
+import threading
+
+from typing import List
+
+logger = logging.getLogger()
+
+
+def source_stamps(paths: List[str]) -> list:
+    stamps = []
+
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            stamps.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            stamps.append(None)
+
+    return stamps
+
+
+class SourcesReloader:
+    """
+    Watches the source files of a provider, reconfiguring it with the service
+    conf returned by load() whenever any of them changes.
+
+    Call check() to poll once, or start() to poll every interval seconds in a
+    daemon thread. A conf which fails to load is logged and kept in
+    last_error; the provider keeps the conf it had.
+
+    The thread doesn't survive os.fork(): the provider restarts it in the
+    child, see after_fork().
+    """
+
+    def __init__(self, provider, paths: List[str], load: callable, interval: float = 1.0):
+        self.provider = provider
+        self.paths = list(paths)
+        self.load = load
+        self.interval = interval
+        self.last_error = None
+        self._stamps = source_stamps(self.paths)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self) -> set:
+        """Reloads if the sources changed, returning the names of the affected services."""
+        stamps = source_stamps(self.paths)
+
+        if stamps == self._stamps:
+            return set()
+
+        self._stamps = stamps
+
+        return self.reload()
+
+    def reload(self) -> set:
+        try:
+            affected = self.provider.reconf(self.load())
+        except Exception as e:
+            logger.exception('Could not reload the service conf from %s', self.paths)
+            self.last_error = e
+
+            return set()
+
+        self.last_error = None
+
+        if affected:
+            logger.info('Reloaded services: %s', ', '.join(sorted(affected)))
+
+        return affected
+
+    def start(self) -> threading.Thread:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name='pyrovider-reload', daemon=True)
+            self._thread.start()
+
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def after_fork(self):
+        """Starts polling again in a forked child, if polling in the parent."""
+        self._stop = threading.Event()
+
+        if self._thread is not None:
+            self._thread = None
+            self.start()
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            self.check()
@@ -0,0 +1,93 @@
+"""
+Binary snapshots of parsed service and app confs, so worker processes can
+skip YAML parsing at startup.
+
+A snapshot is keyed by its source files: it is only used while every source
+still has the same size and mtime or, failing that, the same SHA-256 hash.
+Snapshots are pickles: only load the ones your own deployment wrote.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+
+from typing import List, Optional
+
+SNAPSHOT_VERSION = 1
+
+
+def source_fingerprint(path: str) -> dict:
+    stat = os.stat(path)
+
+    return {'path': os.path.abspath(path),
+            'mtime': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha256': file_hash(path)}
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+
+    with open(path, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(1 << 16), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def is_fresh(fingerprint: dict) -> bool:
+    try:
+        stat = os.stat(fingerprint['path'])
+    except OSError:
+        return False
+
+    if stat.st_mtime_ns == fingerprint['mtime'] and stat.st_size == fingerprint['size']:
+        return True
+
+    return stat.st_size == fingerprint['size'] and file_hash(fingerprint['path']) == fingerprint['sha256']
+
+
+def load_snapshot(path: str, source_paths: List[str], key: any = None) -> Optional[dict]:
+    """
+    The data saved in the snapshot, or None if there is no usable snapshot for
+    these sources and key (any picklable value the data depends on).
+    """
+    try:
+        with open(path, 'rb') as fp:
+            header = pickle.load(fp)
+
+            if (header.get('version') != SNAPSHOT_VERSION
+                    or header.get('key') != key
+                    or [f['path'] for f in header['sources']] != [os.path.abspath(p) for p in source_paths]
+                    or not all(is_fresh(f) for f in header['sources'])):
+                return None
+
+            return pickle.load(fp)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, KeyError, TypeError):
+        return None
+
+
+def save_snapshot(path: str, source_paths: List[str], data: dict, key: any = None,
+                  fingerprints: List[dict] = None):
+    """
+    Saves the data for the sources and key. The file is replaced atomically,
+    so concurrent readers see either the old snapshot or the new one.
+
+    Pass the fingerprints of the sources taken before reading them, so that a
+    source changing while it's parsed invalidates the snapshot.
+    """
+    header = {'version': SNAPSHOT_VERSION,
+              'key': key,
+              'sources': fingerprints or [source_fingerprint(p) for p in source_paths]}
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.pyrovider-snapshot-')
+
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            pickle.dump(header, fp, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(data, fp, protocol=pickle.HIGHEST_PROTOCOL)
+
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
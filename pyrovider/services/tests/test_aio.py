@@ -0,0 +1,232 @@
+import asyncio
+import os
+import unittest
+
+from unittest import mock
+from pyrovider.services.aio import AsyncServiceProvider
+from pyrovider.services.provider import (NoCreationMethodError, ServiceFactory, ServiceProvider,
+                                         UnknownServiceError)
+
+
+SERVICE_CONF = {
+    'client': {'factory': 'pyrovider.services.tests.test_aio.MockClientFactory',
+               'arguments': ['@session', '@settings'],
+               'scope': 'singleton'},
+    'session': {'factory': 'pyrovider.services.tests.test_aio.MockSessionFactory',
+                'named_arguments': {'label': 'default'}},
+    'settings': {'class': 'pyrovider.services.tests.test_aio.MockSettings',
+                 'scope': 'context'},
+    'handler': {'class': 'pyrovider.services.tests.test_aio.MockHandler',
+                'arguments': ['@client', '@parent.settings']},
+    'broken': {},
+}
+
+
+class AsyncServiceProviderTest(unittest.TestCase):
+
+    maxDiff = None
+
+    def setUp(self):
+        # Given...
+        MockSessionFactory.builds = 0
+        MockClientFactory.builds = 0
+        self.parent = ServiceProvider(name='parent')
+        self.parent.conf({'settings': {'class': 'pyrovider.services.tests.test_aio.MockSettings'}})
+        self.provider = AsyncServiceProvider(self.parent)
+        self.provider.conf(SERVICE_CONF)
+
+    def test_getting_a_service_with_an_async_factory(self):
+        # When...
+        session = asyncio.run(self.provider.aget('session', label='custom'))
+        # Then...
+        self.assertIsInstance(session, MockSession)
+        self.assertEqual('custom', session.label)
+
+    def test_getting_a_service_with_async_dependencies(self):
+        # When...
+        handler = asyncio.run(self.provider.aget('handler'))
+        # Then...
+        self.assertIsInstance(handler.client.session, MockSession)
+        self.assertIsInstance(handler.client.settings, MockSettings)
+        self.assertIsInstance(handler.settings, MockSettings)
+
+    def test_deduplicating_concurrent_singleton_builds(self):
+        # Given...
+        async def get_clients():
+            return await asyncio.gather(*(self.provider.aget('client') for _ in range(5)))
+        # When...
+        clients = asyncio.run(get_clients())
+        # Then...
+        self.assertEqual(1, MockClientFactory.builds)
+        self.assertEqual(1, MockSessionFactory.builds)
+        self.assertEqual(1, len({id(c) for c in clients}))
+        self.assertIs(clients[0], asyncio.run(self.provider.aget('client')))
+
+    def test_context_state_per_task(self):
+        # Given...
+        async def get_settings():
+            self.provider.reset()
+            settings = await self.provider.aget('settings')
+            self.assertIs(settings, await self.provider.aget('settings'))
+
+            return settings
+
+        async def get_all_settings():
+            return await asyncio.gather(get_settings(), get_settings())
+        # When...
+        settings_1, settings_2 = asyncio.run(get_all_settings())
+        # Then...
+        self.assertIsNot(settings_1, settings_2)
+
+    def test_setting_a_service(self):
+        # Given...
+        session = MockSession('set')
+        # When...
+        async def get_session():
+            self.provider.set('session', session)
+
+            return await self.provider.aget('session')
+        # Then...
+        self.assertIs(session, asyncio.run(get_session()))
+
+    def test_disposing_services_asynchronously(self):
+        # Given...
+        self.provider.conf(dict(SERVICE_CONF, connection={'class': 'pyrovider.services.tests.test_aio.MockConnection',
+                                                         'scope': 'context'}))
+
+        async def request():
+            connection = await self.provider.aget('connection')
+            await self.provider.aget('settings')
+            report = await self.provider.areset()
+
+            return connection, report
+        # When...
+        connection, report = asyncio.run(request())
+        # Then...
+        self.assertTrue(connection.closed)
+        self.assertEqual(1, report['disposed'])
+        self.assertEqual([], report['errors'])
+
+    def test_sharing_context_services_of_parents(self):
+        # Given...
+        self.parent.conf({'connection': {'class': 'pyrovider.services.tests.test_aio.MockConnection',
+                                         'scope': 'context'}})
+        self.provider.conf(dict(SERVICE_CONF, repository={'class': 'pyrovider.services.tests.test_aio.MockRepository',
+                                                         'arguments': ['@parent.connection']}))
+
+        async def request():
+            repositories = [await self.provider.aget('repository') for _ in range(2)]
+
+            return repositories, await self.provider.areset()
+        # When...
+        (repository_1, repository_2), report = asyncio.run(request())
+        # Then...
+        self.assertIs(repository_1.connection, repository_2.connection)
+        self.assertTrue(repository_1.connection.closed)
+        self.assertEqual(1, report['disposed'])
+
+    def test_getting_memoized_services(self):
+        # Given...
+        self.provider.conf(dict(SERVICE_CONF, session=dict(SERVICE_CONF['session'], memoize=True)))
+
+        async def get_sessions():
+            return [await self.provider.aget('session', label=label) for label in ('a', 'b', 'a')]
+        # When...
+        session_a_1, session_b, session_a_2 = asyncio.run(get_sessions())
+        # Then...
+        self.assertIs(session_a_1, session_a_2)
+        self.assertIsNot(session_a_1, session_b)
+        self.assertEqual(2, MockSessionFactory.builds)
+        self.assertEqual({'hits': 1, 'misses': 2}, {k: v for k, v in self.provider.memo_stats()['session'].items()
+                                                     if k in ('hits', 'misses')})
+
+    def test_not_building_unused_env_fallbacks(self):
+        # Given...
+        self.provider.conf(dict(SERVICE_CONF, handler={'class': 'pyrovider.services.tests.test_aio.MockHandler',
+                                                      'arguments': ['@client', ['$PYROVIDER_TEST_SETTINGS', '@broken']]}))
+        # When...
+        with mock.patch.dict(os.environ, {'PYROVIDER_TEST_SETTINGS': '"set"'}):
+            handler = asyncio.run(self.provider.aget('handler'))
+        # Then...
+        self.assertEqual('set', handler.settings)
+
+    def test_getting_broken_and_unknown_services(self):
+        # When, then...
+        with self.assertRaises(NoCreationMethodError):
+            asyncio.run(self.provider.aget('broken'))
+        with self.assertRaises(UnknownServiceError):
+            asyncio.run(self.provider.aget('unknown'))
+
+
+class MockSession():
+
+    def __init__(self, label):
+        self.label = label
+
+
+class MockSessionFactory(ServiceFactory):
+
+    builds = 0
+
+    def __init__(self, label):
+        self.label = label
+
+    async def build(self):
+        MockSessionFactory.builds += 1
+        await asyncio.sleep(0.01)
+
+        return MockSession(self.label)
+
+
+class MockSettings():
+
+    pass
+
+
+class MockClient():
+
+    def __init__(self, session, settings):
+        self.session = session
+        self.settings = settings
+
+
+class MockClientFactory(ServiceFactory):
+
+    builds = 0
+
+    def __init__(self, session, settings):
+        self.session = session
+        self.settings = settings
+
+    async def build(self):
+        MockClientFactory.builds += 1
+        await asyncio.sleep(0.01)
+
+        return MockClient(self.session, self.settings)
+
+
+class MockConnection():
+
+    def __init__(self):
+        self.closed = False
+
+    async def aclose(self):
+        await asyncio.sleep(0)
+        self.closed = True
+
+
+class MockRepository():
+
+    def __init__(self, connection):
+        self.connection = connection
+
+
+class MockHandler():
+
+    def __init__(self, client, settings):
+        self.client = client
+        self.settings = settings
+
+
+if __name__ == '__main__':
+    unittest.main()
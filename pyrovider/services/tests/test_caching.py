@@ -0,0 +1,108 @@
+import unittest
+
+from unittest import mock
+from pyrovider.services.caching import MemoCache, ResolutionCache
+
+
+class ResolutionCacheTest(unittest.TestCase):
+
+    maxDiff = None
+
+    def setUp(self):
+        # Given...
+        self.cache = ResolutionCache()
+
+    def test_parsing_literals(self):
+        # When, then...
+        self.assertEqual(1, self.cache.literal('1'))
+        self.assertEqual(False, self.cache.literal('False'))
+        self.assertEqual('production', self.cache.literal('production'))
+        self.assertEqual('Some phrase.', self.cache.literal('Some phrase.'))
+        self.assertEqual({'env': {'hits': 0, 'misses': 4}, 'conf': {'hits': 0, 'misses': 0}},
+                         self.cache.stats())
+
+    def test_caching_literals(self):
+        # When...
+        self.cache.literal('1')
+        self.cache.literal('1')
+        # Then...
+        self.assertEqual({'hits': 1, 'misses': 1}, self.cache.stats()['env'])
+
+    def test_not_sharing_mutable_literals(self):
+        # When...
+        list_1 = self.cache.literal('[1, 2]')
+        list_2 = self.cache.literal('[1, 2]')
+        # Then...
+        self.assertEqual([1, 2], list_1)
+        self.assertIsNot(list_1, list_2)
+        self.assertEqual({'hits': 0, 'misses': 2}, self.cache.stats()['env'])
+
+    def test_caching_conf_values(self):
+        # Given...
+        resolve = mock.MagicMock(return_value='value')
+        # When...
+        self.cache.conf('a.b', resolve)
+        self.cache.conf('a.b', resolve)
+        self.cache.invalidate()
+        self.cache.conf('a.b', resolve)
+        # Then...
+        self.assertEqual(2, resolve.call_count)
+        self.assertEqual({'hits': 1, 'misses': 2}, self.cache.stats()['conf'])
+
+    def test_not_caching_conf_errors(self):
+        # Given...
+        resolve = mock.MagicMock(side_effect=KeyError('a'))
+        # When, then...
+        for _ in range(2):
+            with self.assertRaises(KeyError):
+                self.cache.conf('a', resolve)
+        self.assertEqual(2, resolve.call_count)
+
+
+class MemoCacheTest(unittest.TestCase):
+
+    maxDiff = None
+
+    def test_evicting_least_recently_used_entries(self):
+        # Given...
+        on_evict = mock.Mock()
+        cache = MemoCache(max_size=2, on_evict=on_evict)
+        # When...
+        a, _ = cache.get('a', object)
+        cache.get('b', object)
+        self.assertEqual((a, True), cache.get('a', object))
+        cache.get('c', object)
+        # Then...
+        on_evict.assert_called_once_with('b', mock.ANY)
+        self.assertEqual({'hits': 1, 'misses': 3, 'evictions': 1, 'expirations': 0,
+                          'size': 2, 'max_size': 2, 'hit_rate': 0.25},
+                         cache.stats())
+
+    def test_expiring_entries(self):
+        # Given...
+        on_evict = mock.Mock()
+        cache = MemoCache(ttl=0, on_evict=on_evict)
+        a, _ = cache.get('a', object)
+        # When...
+        b, hit = cache.get('a', object)
+        # Then...
+        self.assertFalse(hit)
+        self.assertIsNot(a, b)
+        on_evict.assert_called_once_with('a', a)
+        self.assertEqual(1, cache.stats()['expirations'])
+
+    def test_clearing_entries(self):
+        # Given...
+        on_evict = mock.Mock(side_effect=RuntimeError())
+        cache = MemoCache(on_evict=on_evict)
+        cache.get('a', object)
+        cache.get('b', object)
+        # When...
+        cache.clear()
+        # Then...
+        self.assertEqual(2, on_evict.call_count)
+        self.assertEqual(0, cache.stats()['size'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pyrovider.services.confstore import MappedConf, open_conf_store, write_conf_store
+from pyrovider.services.provider import BadConfPathError, ServiceProvider
+
+
+class ConfStoreTest(unittest.TestCase):
+
+    maxDiff = None
+
+    def setUp(self):
+        # Given...
+        self.directory = tempfile.mkdtemp()
+        self.source_path = os.path.join(self.directory, 'app_conf.yaml')
+        self.store_path = os.path.join(self.directory, 'app_conf.store')
+        self.app_conf = {'some_app': {'api': {'version': '1', 'url': 'https://api.some-app.com/v1/'},
+                                      'features': ['a', 'b'],
+                                      'limits': {1: 10, 'none': None}},
+                         'debug': False}
+
+        with open(self.source_path, 'w') as fp:
+            fp.write("debug: false\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_looking_up_paths(self):
+        # Given...
+        write_conf_store(self.store_path, self.app_conf)
+        # When...
+        store = open_conf_store(self.store_path)
+        # Then...
+        self.assertIsInstance(store, MappedConf)
+        self.assertEqual('1', store.lookup(['some_app', 'api', 'version']))
+        self.assertEqual(self.app_conf['some_app'], store.lookup(['some_app']))
+        self.assertEqual(['a', 'b'], store.lookup(['some_app', 'features', 'first']))
+        self.assertEqual('b', store.lookup(['some_app', 'features', '1']))
+        self.assertIsNone(store.lookup(['some_app', 'limits', 'none']))
+        self.assertIs(False, store['debug'])
+        self.assertEqual(self.app_conf, dict(store))
+        with self.assertRaises(KeyError) as context:
+            store.lookup(['some_app', 'nope', 'version'])
+        self.assertEqual(('nope',), context.exception.args)
+
+    def test_not_opening_a_stale_or_corrupt_store(self):
+        # When...
+        write_conf_store(self.store_path, self.app_conf, [self.source_path])
+        fresh = open_conf_store(self.store_path, [self.source_path])
+        with open(self.source_path, 'a') as fp:
+            fp.write("more: true\n")
+        # Then...
+        self.assertIsNotNone(fresh)
+        self.assertIsNone(open_conf_store(self.store_path, [self.source_path]))
+        with open(self.store_path, 'wb') as fp:
+            fp.write(b'garbage')
+        self.assertIsNone(open_conf_store(self.store_path))
+
+    def test_resolving_conf_references_from_a_store(self):
+        # Given...
+        write_conf_store(self.store_path, self.app_conf)
+        provider = ServiceProvider()
+        provider.conf({'service-a': {'class': 'pyrovider.services.tests.test_provider.MockServiceI',
+                                     'arguments': ['%some_app.api%', '%some_app.api.url%']},
+                       'service-b': {'class': 'pyrovider.services.tests.test_provider.MockServiceA',
+                                     'arguments': ['%some_app.nope%']}},
+                      open_conf_store(self.store_path))
+        # When...
+        service_a = provider.get('service-a')
+        # Then...
+        self.assertEqual(self.app_conf['some_app']['api'], service_a.some_services_1)
+        self.assertEqual('https://api.some-app.com/v1/', service_a.some_services_2)
+        with self.assertRaises(BadConfPathError) as context:
+            provider.get('service-b')
+        self.assertEqual('The path "nope" was not found in the app configuration.', str(context.exception))
@@ -0,0 +1,89 @@
+import contextvars
+import gc
+import threading
+import unittest
+import weakref
+
+from pyrovider.services.context import ContextState, ContextVarBackend, LocalBackend
+from pyrovider.services.provider import ServiceProvider
+
+
+class ContextVarBackendTest(unittest.TestCase):
+
+    maxDiff = None
+    backend_class = ContextVarBackend
+
+    def setUp(self):
+        # Given...
+        self.backend = self.backend_class()
+
+    def test_state_per_context(self):
+        # Given...
+        states = []
+        thread = threading.Thread(target=lambda: states.append(self.backend.state()))
+        # When...
+        state = self.backend.state()
+        thread.start()
+        thread.join()
+        # Then...
+        self.assertIsInstance(state, ContextState)
+        self.assertIs(state, self.backend.state())
+        self.assertIsNot(state, states[0])
+
+    def test_binding_and_releasing_state(self):
+        # Given...
+        state = ContextState()
+        # When...
+        self.backend.bind(state)
+        bound = self.backend.state()
+        self.backend.release()
+        # Then...
+        self.assertIs(state, bound)
+        self.assertIsNot(state, self.backend.state())
+
+    def test_provider_with_backend(self):
+        # Given...
+        provider = ServiceProvider(context=self.backend)
+        provider.conf({'service-a': {'class': 'pyrovider.services.tests.test_provider.MockServiceA',
+                                     'scope': 'context'}})
+        # When...
+        service_a = provider.get('service-a')
+        # Then...
+        self.assertIs(service_a, provider.get('service-a'))
+        provider.reset()
+        self.assertIsNot(service_a, provider.get('service-a'))
+
+
+class ContextVarStatesTest(unittest.TestCase):
+
+    def test_releasing_state_in_another_context(self):
+        # Given...
+        backend, other_backend = ContextVarBackend(), ContextVarBackend()
+        state, other_state = backend.state(), other_backend.state()
+        # When...
+        contextvars.copy_context().run(backend.release)
+        contextvars.copy_context().run(other_backend.bind, ContextState())
+        # Then...
+        self.assertIs(state, backend.state())
+        self.assertIs(other_state, other_backend.state())
+
+    def test_dropping_the_states_of_dropped_providers(self):
+        # Given...
+        provider = ServiceProvider()
+        provider.conf({'service-a': {'class': 'pyrovider.services.tests.test_provider.MockServiceA',
+                                     'scope': 'context'}})
+        service_a = weakref.ref(provider.get('service-a'))
+        # When...
+        del provider
+        gc.collect()
+        # Then...
+        self.assertIsNone(service_a())
+
+
+class LocalBackendTest(ContextVarBackendTest):
+
+    backend_class = LocalBackend
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 import yaml
 
@@ -81,3 +83,147 @@ class FactoryTest(unittest.TestCase):
 
         assert p.get("parent.serviceA")
         assert p.parent.get("serviceA")
+
+    def test_build_with_duplicated_entries(self):
+        source = factories.ServiceDefinitionSource(
+            "test", "pyrovider/services/tests/test_provider/service_conf_2.yaml", False
+        )
+
+        with self.assertRaises(ValueError) as context:
+            factories.service_provider_from_sources(source, source)
+
+        assert (
+            "Duplicated entry serviceA from source test "
+            "(pyrovider/services/tests/test_provider/service_conf_2.yaml)\n"
+            "Duplicated entry serviceB from source test "
+            "(pyrovider/services/tests/test_provider/service_conf_2.yaml)"
+        ) == str(context.exception)
+
+    def test_build_from_sources_in_parallel(self):
+        sources = (
+            factories.ServiceDefinitionSource(
+                "test", "pyrovider/services/tests/test_provider/service_conf_2.yaml"
+            ),
+            factories.ServiceDefinitionSource(
+                "test2", "pyrovider/services/tests/test_provider/service_conf_with_namespaces.yaml"
+            ),
+        )
+
+        p = factories.service_provider_from_sources(*sources, max_workers=2)
+
+        assert list(factories.service_provider_from_sources(*sources).service_conf) == list(p.service_conf)
+        assert ["service1"] == list(p.test2.service_names)
+
+    def test_build_from_yaml_with_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            snapshot_path = os.path.join(directory, "snapshot.bin")
+            args = ("pyrovider/services/tests/test_provider/service_conf_with_namespaces.yaml",)
+            kwargs = dict(app_conf_path="pyrovider/services/tests/test_provider/app_conf.yaml",
+                          snapshot_path=snapshot_path)
+
+            p = factories.service_provider_from_yaml(*args, **kwargs)
+
+            with mock.patch.object(factories, "parse_yaml") as full_load:
+                p2 = factories.service_provider_from_yaml(*args, **kwargs)
+
+            full_load.assert_not_called()
+            assert p.service_conf == p2.service_conf
+            assert p.app_conf == p2.app_conf
+            assert ["bar"] == list(p2.foo.namespaces)
+            assert p2.foo.bar.service4
+
+    def test_build_from_sources_with_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            snapshot_path = os.path.join(directory, "snapshot.bin")
+            sources = (
+                factories.ServiceDefinitionSource(
+                    "test", "pyrovider/services/tests/test_provider/service_conf_2.yaml"
+                ),
+                factories.ServiceDefinitionSource(
+                    "test2", "pyrovider/services/tests/test_provider/service_conf_with_namespaces.yaml"
+                ),
+            )
+
+            p = factories.service_provider_from_sources(*sources, snapshot_path=snapshot_path)
+
+            with mock.patch.object(factories, "parse_yaml") as full_load:
+                p2 = factories.service_provider_from_sources(*sources, snapshot_path=snapshot_path)
+                # Sources merged differently don't share the snapshot
+                factories.service_provider_from_sources(sources[0], snapshot_path=snapshot_path)
+
+            assert 1 == full_load.call_count
+            assert p.service_conf == p2.service_conf
+            assert ["service1"] == list(p2.test2.service_names)
+
+    def test_reloading_sources(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "services.yaml")
+            service_a = {"class": "pyrovider.services.tests.test_provider.MockServiceA", "scope": "singleton"}
+
+            with open(path, "w") as fp:
+                yaml.dump({"service-a": service_a}, fp)
+
+            p = factories.service_provider_from_sources(factories.ServiceDefinitionSource("test", path),
+                                                        watch_interval=3600)
+            a = p.test.service_a
+            assert set() == p.reloader.check()
+
+            with open(path, "w") as fp:
+                yaml.dump({"service-a": service_a, "service-b": service_a}, fp)
+
+            assert {"test.service-b", "test.service_b"} == p.reloader.check()
+            assert a is p.test.service_a
+            assert p.test.service_b is not a
+
+            with open(path, "w") as fp:
+                fp.write("service-a: [")
+
+            assert set() == p.reloader.reload()
+            assert p.reloader.last_error is not None
+            assert a is p.test.service_a
+
+            p.reloader.stop()
+
+    @unittest.skipUnless(hasattr(os, "register_at_fork"), "os.register_at_fork() is required")
+    def test_reloading_sources_in_forked_processes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "services.yaml")
+
+            with open(path, "w") as fp:
+                yaml.dump({"service-a": {"class": "pyrovider.services.tests.test_provider.MockServiceA"}}, fp)
+
+            p = factories.service_provider_from_sources(factories.ServiceDefinitionSource("test", path),
+                                                        watch_interval=3600)
+            read_fd, write_fd = os.pipe()
+            pid = os.fork()
+
+            if not pid:
+                os.close(read_fd)
+                os.write(write_fd, bytes([p.reloader._thread.is_alive()]))
+                os._exit(0)
+
+            os.close(write_fd)
+
+            with os.fdopen(read_fd, "rb") as fp:
+                alive = fp.read()
+
+            os.waitpid(pid, 0)
+            p.reloader.stop()
+
+            assert b"\x01" == alive
+
+    def test_build_from_yaml_with_app_conf_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store_path = os.path.join(directory, "app_conf.store")
+            args = ("pyrovider/services/tests/test_provider/service_conf.yaml",)
+            kwargs = dict(app_conf_path="pyrovider/services/tests/test_provider/app_conf.yaml",
+                          app_conf_store_path=store_path)
+
+            p = factories.service_provider_from_yaml(*args, **kwargs)
+
+            with mock.patch.object(factories, "write_conf_store") as write_conf_store:
+                p2 = factories.service_provider_from_yaml(*args, **kwargs)
+
+            write_conf_store.assert_not_called()
+            assert "https://api.some-app.com/v1/" == p2.get("service-b").some_configuration["url"]
+            assert p.app_conf.path == p2.app_conf.path == store_path
@@ -0,0 +1,53 @@
+import unittest
+
+from pyrovider.services.graph import DependencyGraph
+
+
+class DependencyGraphTest(unittest.TestCase):
+
+    maxDiff = None
+
+    def setUp(self):
+        # Given...
+        self.graph = DependencyGraph({'a': [],
+                                      'b': ['a', 'external'],
+                                      'c': ['a', 'b'],
+                                      'd': ['c']})
+
+    def test_dependencies(self):
+        # When, then...
+        self.assertEqual(['a'], self.graph.dependencies('b'))
+        self.assertEqual(['a', 'b'], self.graph.dependencies('c'))
+
+    def test_dependents(self):
+        # When, then...
+        self.assertEqual({'b', 'c', 'd'}, self.graph.dependents(['a']))
+        self.assertEqual(set(), self.graph.dependents(['d']))
+
+    def test_levels(self):
+        # When, then...
+        self.assertEqual([['a'], ['b'], ['c'], ['d']], self.graph.levels())
+
+    def test_levels_of_independent_services(self):
+        # Given...
+        graph = DependencyGraph({'a': [], 'b': [], 'c': ['a', 'b']})
+        # When, then...
+        self.assertEqual([['a', 'b'], ['c']], graph.levels())
+
+    def test_no_cycles(self):
+        # When, then...
+        self.assertEqual([], self.graph.cycles())
+
+    def test_cycles(self):
+        # Given...
+        self.graph.add('a', ['d'])
+        self.graph.add('e', ['e'])
+        # When...
+        cycles = self.graph.cycles()
+        # Then...
+        self.assertEqual([['a', 'd', 'c', 'a'], ['a', 'd', 'c', 'b', 'a'], ['e', 'e']], cycles)
+        self.assertEqual([], self.graph.levels())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import asyncio
+import unittest
+import yaml
+
+from unittest import mock
+from pyrovider.services.aio import AsyncServiceProvider
+from pyrovider.services.instrumentation import Instrument, StatsCollector
+from pyrovider.services.provider import NoCreationMethodError, ServiceProvider
+
+
+class InstrumentationTest(unittest.TestCase):
+
+    maxDiff = None
+    service_conf_path = 'pyrovider/services/tests/test_provider/service_conf.yaml'
+    app_conf_path = 'pyrovider/services/tests/test_provider/app_conf.yaml'
+
+    def setUp(self):
+        # Given...
+        self.provider = ServiceProvider()
+        with open(self.service_conf_path, 'r') as fp:
+            self.service_conf = yaml.safe_load(fp.read())
+        with open(self.app_conf_path, 'r') as fp:
+            self.app_conf = yaml.safe_load(fp.read())
+        self.provider.conf(self.service_conf, self.app_conf)
+
+    def test_calling_instrument_hooks(self):
+        # Given...
+        instrument = mock.MagicMock(spec=Instrument)
+        self.provider.add_instrument(instrument)
+        # When...
+        self.provider.get('service-c')
+        self.provider.get('service-j')
+        self.provider.get('service-j')
+        self.provider.remove_instrument(instrument)
+        self.provider.get('service-a')
+        # Then...
+        self.assertEqual([mock.call(self.provider, 'service-c'),
+                          mock.call(self.provider, 'service-b'),
+                          mock.call(self.provider, 'service-a'),
+                          mock.call(self.provider, 'service-a'),
+                          mock.call(self.provider, 'service-j'),
+                          mock.call(self.provider, 'service-j')],
+                         instrument.resolution_started.call_args_list)
+        self.assertEqual(['service-a', 'service-b', 'service-a', 'service-c', 'service-j', 'service-j'],
+                         [c[0][1] for c in instrument.resolution_finished.call_args_list])
+        self.assertEqual('factory', instrument.resolution_finished.call_args_list[3][0][2])
+        instrument.cache_miss.assert_called_once_with(self.provider, 'service-j', 'singleton')
+        instrument.cache_hit.assert_called_once_with(self.provider, 'service-j', 'singleton')
+
+    def test_collecting_stats(self):
+        # Given...
+        collector = self.provider.collect_stats()
+        self.provider.set('service-a', object())
+        # When...
+        self.provider.get('service-c')
+        self.provider.get('service-c')
+        self.provider.get('service-k')
+        self.provider.get('service-k')
+        with self.assertRaises(NoCreationMethodError):
+            self.provider.get('service-d')
+        stats = self.provider.stats()
+        # Then...
+        self.assertIs(collector, self.provider.collect_stats())
+        self.assertEqual(2, stats['service-c']['count'])
+        self.assertEqual('factory', stats['service-c']['method'])
+        self.assertEqual([], stats['service-c']['paths'])
+        self.assertGreaterEqual(stats['service-c']['total_time'], stats['service-b']['total_time'])
+        self.assertLessEqual(stats['service-c']['self_time'], stats['service-c']['total_time'])
+        self.assertEqual('set', stats['service-a']['method'])
+        self.assertEqual(4, stats['service-a']['count'])
+        self.assertEqual([('service-c', 'service-b'), ('service-c',)], stats['service-a']['paths'])
+        self.assertEqual((1, 1), (stats['service-k']['cache_hits'], stats['service-k']['cache_misses']))
+        self.assertEqual(1, stats['service-d']['errors'])
+        self.assertIn('service-c', collector.dump(limit=3))
+
+    def test_collecting_stats_from_within_a_resolution(self):
+        # Given...
+        self.provider.conf({'starter': {'class': 'pyrovider.services.tests.test_instrumentation.MockStatsStarter',
+                                        'arguments': ['^pyrovider.services.tests.test_instrumentation.provider']},
+                            'service-a': {'class': 'pyrovider.services.tests.test_provider.MockServiceA'}})
+        self.provider.add_instrument(Instrument())
+        global provider
+        provider = self.provider
+        # When...
+        starter = self.provider.get('starter')
+        # Then...
+        self.assertIsNotNone(starter.service_a)
+        self.assertEqual(['service-a'], list(self.provider.stats()))
+
+    def test_not_collecting_stats_by_default(self):
+        # When...
+        self.provider.get('service-c')
+        # Then...
+        self.assertEqual({}, self.provider.stats())
+
+    def test_collecting_async_stats(self):
+        # Given...
+        provider = AsyncServiceProvider(name='app')
+        provider.conf(self.service_conf, self.app_conf)
+        collector = StatsCollector()
+        provider.add_instrument(collector)
+        # When...
+        asyncio.run(provider.aget('service-i'))
+        stats = collector.stats()
+        # Then...
+        self.assertEqual(1, stats['app.service-i']['count'])
+        self.assertEqual([('app.service-i',)], stats['app.service-c']['paths'])
+        self.assertEqual([('app.service-i',),
+                          ('app.service-i', 'app.service-b'),
+                          ('app.service-i', 'app.service-c'),
+                          ('app.service-i', 'app.service-c', 'app.service-b')],
+                         sorted(stats['app.service-a']['paths']))
+
+
+provider = None
+
+
+class MockStatsStarter():
+
+    def __init__(self, provider):
+        provider.collect_stats()
+        self.service_a = provider.get('service-a')
+
+
+if __name__ == '__main__':
+    unittest.main()
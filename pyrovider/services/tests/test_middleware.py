@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import unittest
+
+from wsgiref.util import setup_testing_defaults
+from pyrovider.services.aio import AsyncServiceProvider
+from pyrovider.services import middleware
+from pyrovider.services.middleware import ASGIMiddleware, WSGIMiddleware
+from pyrovider.services.provider import ServiceProvider
+
+
+SERVICE_CONF = {
+    'connection': {'class': 'pyrovider.services.tests.test_middleware.MockConnection',
+                   'arguments': ['@parent.settings'],
+                   'scope': 'context'},
+    'repository': {'class': 'pyrovider.services.tests.test_middleware.MockRepository',
+                   'arguments': ['@connection']},
+}
+
+
+class WSGIMiddlewareTest(unittest.TestCase):
+
+    def setUp(self):
+        # Given...
+        self.parent = ServiceProvider(name='parent')
+        self.parent.conf({'settings': {'class': 'pyrovider.services.tests.test_middleware.MockSettings',
+                                        'scope': 'context'}})
+        self.provider = ServiceProvider(self.parent)
+        self.provider.conf(SERVICE_CONF)
+        self.repositories = []
+
+        def app(environ, start_response):
+            repository = self.provider.get('repository')
+            self.repositories.append(repository)
+            self.assertIs(repository.connection, self.provider.get('connection'))
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+
+            return [b'rows: ', repository.connection.query()]
+
+        self.app = WSGIMiddleware(app, self.provider, log_level=logging.INFO)
+
+    def request(self) -> tuple:
+        environ = {}
+        setup_testing_defaults(environ)
+        started = []
+        response = self.app(environ, lambda status, headers, exc_info=None: started.append((status, headers)))
+        body = b''.join(response)
+        closed_before_close = self.repositories[-1].connection.closed
+        response.close()
+
+        return started[0], body, closed_before_close
+
+    def test_running_requests_in_contexts_of_their_own(self):
+        # When...
+        with self.assertLogs(level='INFO') as logs:
+            (status, headers), body, closed_before_close = self.request()
+            self.request()
+        # Then...
+        connection_1, connection_2 = [r.connection for r in self.repositories]
+        self.assertEqual('200 OK', status)
+        self.assertEqual(b'rows: 42', body)
+        self.assertFalse(closed_before_close)
+        self.assertTrue(connection_1.closed)
+        self.assertTrue(connection_2.closed)
+        self.assertIsNot(connection_1, connection_2)
+        self.assertIsNot(connection_1.settings, connection_2.settings)
+        self.assertEqual(['Content-Type', 'X-DI-Time'], [h[0] for h in headers])
+        self.assertLessEqual(0, float(headers[1][1]))
+        self.assertEqual(2, len(logs.records))
+        self.assertEqual(2, logs.records[0].di_resolutions)
+        self.assertEqual(1, logs.records[0].di_disposed)
+        self.assertLessEqual(0, logs.records[0].di_time)
+        self.assertIsNone(middleware._requests.get(self.app.timer))
+
+    def test_tearing_down_failed_requests(self):
+        # Given...
+        def app(environ, start_response):
+            self.repositories.append(self.provider.get('repository'))
+
+            raise RuntimeError()
+
+        self.app = WSGIMiddleware(app, self.provider, header=None)
+        # When...
+        with self.assertRaises(RuntimeError):
+            self.app({}, lambda status, headers, exc_info=None: None)
+        # Then...
+        self.assertTrue(self.repositories[0].connection.closed)
+
+
+class ASGIMiddlewareTest(unittest.TestCase):
+
+    def setUp(self):
+        # Given...
+        self.parent = ServiceProvider(name='parent')
+        self.parent.conf({'settings': {'class': 'pyrovider.services.tests.test_middleware.MockSettings',
+                                        'scope': 'context'}})
+        self.provider = AsyncServiceProvider(self.parent)
+        self.provider.conf(SERVICE_CONF)
+        self.repositories = []
+
+        async def app(scope, receive, send):
+            if 'lifespan' == scope['type']:
+                await send({'type': 'lifespan.startup.complete'})
+                return
+
+            repository = await self.provider.aget('repository')
+            self.repositories.append(repository)
+            await send({'type': 'http.response.start', 'status': 200,
+                        'headers': [(b'content-type', b'text/plain')]})
+            await send({'type': 'http.response.body', 'body': repository.connection.query()})
+
+        self.app = ASGIMiddleware(app, self.provider)
+
+    def request(self, scope_type: str = 'http') -> list:
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(self.app({'type': scope_type}, receive, send))
+
+        return messages
+
+    def test_running_requests_in_contexts_of_their_own(self):
+        # When...
+        start_1, body_1 = self.request()
+        self.request()
+        # Then...
+        connection_1, connection_2 = [r.connection for r in self.repositories]
+        self.assertEqual(b'42', body_1['body'])
+        self.assertTrue(connection_1.closed)
+        self.assertTrue(connection_1.aclosed)
+        self.assertTrue(connection_2.closed)
+        self.assertIsNot(connection_1, connection_2)
+        self.assertEqual([b'content-type', b'x-di-time'], [h[0] for h in start_1['headers']])
+        self.assertLessEqual(0, float(start_1['headers'][1][1]))
+
+    def test_passing_lifespan_events_through(self):
+        # When...
+        messages = self.request('lifespan')
+        # Then...
+        self.assertEqual([{'type': 'lifespan.startup.complete'}], messages)
+        self.assertEqual([], self.repositories)
+
+
+class MockSettings():
+
+    pass
+
+
+class MockConnection():
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.closed = False
+        self.aclosed = False
+
+    def query(self):
+        return b'42'
+
+    def close(self):
+        self.closed = True
+
+    async def aclose(self):
+        self.aclosed = True
+        self.close()
+
+
+class MockRepository():
+
+    def __init__(self, connection):
+        self.connection = connection
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,7 +6,8 @@ from pyrovider.meta.construction import Singleton
 from pyrovider.services.provider import (BadConfPathError,
                                          NoCreationMethodError,
                                          NotAServiceFactoryError,
-                                         ServiceFactory, ServiceProvider,
+                                         Namespace, ServiceAttributeError, ServiceFactory,
+                                         ServiceProvider,
                                          TooManyCreationMethodsError,
                                          UnknownServiceError)
 
@@ -66,6 +67,13 @@ class NamespaceTest(unittest.TestCase):
         assert self.provider.foo.path == "foo"
         assert self.provider.foo.bar.path == "foo.bar"
 
+    def test_getting_many_namespace_services(self):
+        service4, service2 = self.provider.foo.get_many(["bar.service4", "service2"])
+
+        assert service4 is not service2
+        assert service2.some_services_1 is service2.some_services_2
+        assert isinstance(service2, type(self.provider.foo.service2))
+
     def test_setting_service_in_namespace(self):
         class Dummy:
             pass
@@ -74,3 +82,49 @@ class NamespaceTest(unittest.TestCase):
 
         self.provider.foo.bar.set("service4", d)
         assert self.provider.foo.bar.service4 == d
+
+    def test_accessing_services_named_as_namespace_attributes(self):
+        # Given...
+        self.provider.conf({'foo.get': {'class': 'pyrovider.services.tests.test_provider.MockServiceA'},
+                            'foo.name': {'class': 'pyrovider.services.tests.test_provider.MockServiceA'},
+                            'foo.bar.baz': {'class': 'pyrovider.services.tests.test_provider.MockServiceA'},
+                            'foo.qux': {'class': 'pyrovider.services.tests.test_provider.MockServiceA'}})
+        from ..tests.test_provider import MockServiceA
+        # When, then...
+        assert "foo" == self.provider.foo.name
+        assert callable(self.provider.foo.get)
+        assert isinstance(self.provider.foo.get("get"), MockServiceA)
+        assert isinstance(self.provider.foo.get("name"), MockServiceA)
+        assert isinstance(self.provider.foo.qux, MockServiceA)
+        assert isinstance(self.provider.foo.bar.baz, MockServiceA)
+        assert isinstance(self.provider.foo, Namespace)
+        assert "foo.bar" == self.provider.foo.bar.path
+
+    def test_accessing_unknown_namespace_attributes(self):
+        with self.assertRaises(AttributeError):
+            self.provider.foo.service4
+
+    def test_accessing_services_failing_with_attribute_errors(self):
+        # Given...
+        broken = {'class': 'pyrovider.services.tests.test_namespaces.BrokenService'}
+        self.provider.conf({'foo.broken': broken, 'broken': broken})
+        BrokenService.builds = 0
+        # When, then...
+        with self.assertRaises(ServiceAttributeError) as context:
+            self.provider.foo.broken
+        self.assertIsInstance(context.exception.__cause__, AttributeError)
+        self.assertEqual(1, BrokenService.builds)
+        with self.assertRaises(ServiceAttributeError):
+            hasattr(self.provider, 'broken')
+        with self.assertRaises(ServiceAttributeError):
+            getattr(self.provider.foo, 'broken', None)
+        self.assertEqual(3, BrokenService.builds)
+
+
+class BrokenService():
+
+    builds = 0
+
+    def __init__(self):
+        BrokenService.builds += 1
+        self.missing.attribute
@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+import unittest
+
+from unittest import mock
+
+from pyrovider.services.provider import ServiceProvider
+
+
+SERVICE_CONF = {
+    'slow-a': {'class': 'pyrovider.services.tests.test_parallel.SlowService', 'arguments': ['a']},
+    'slow-b': {'class': 'pyrovider.services.tests.test_parallel.SlowService', 'arguments': ['b']},
+    'slow-c': {'class': 'pyrovider.services.tests.test_parallel.SlowService', 'arguments': ['c'],
+               'scope': 'context'},
+    'broken-a': {'class': 'pyrovider.services.tests.test_parallel.BrokenService', 'arguments': ['a']},
+    'broken-b': {'class': 'pyrovider.services.tests.test_parallel.BrokenService', 'arguments': ['b']},
+    'root': {'class': 'pyrovider.services.tests.test_parallel.RootService',
+             'arguments': ['@slow-a', '@slow-b'],
+             'named_arguments': {'slow_c': '@slow-c'}},
+    'swapped-root': {'class': 'pyrovider.services.tests.test_parallel.RootService',
+                     'arguments': ['@slow-b', '@slow-a']},
+    'pair-root': {'class': 'pyrovider.services.tests.test_parallel.RootService',
+                  'arguments': ['@root', '@swapped-root']},
+    'env-root': {'class': 'pyrovider.services.tests.test_parallel.RootService',
+                 'arguments': ['@slow-a', ['$PYROVIDER_TEST_SLOW_B', '@broken-b']]},
+    'single-root': {'class': 'pyrovider.services.tests.test_parallel.RootService',
+                    'arguments': ['@slow-a', '@slow-b'],
+                    'scope': 'singleton'},
+    'single-user': {'class': 'pyrovider.services.tests.test_parallel.UserService',
+                    'arguments': ['@single-root', '@slow-c']},
+    'broken-root': {'class': 'pyrovider.services.tests.test_parallel.RootService',
+                    'arguments': ['@slow-a', '@broken-b'],
+                    'named_arguments': {'slow_c': '@broken-a'}},
+}
+
+
+class ParallelConstructionTest(unittest.TestCase):
+
+    maxDiff = None
+
+    def setUp(self):
+        # Given...
+        self.provider = ServiceProvider(max_workers=4)
+        self.provider.conf(SERVICE_CONF)
+
+    def test_building_dependencies_concurrently(self):
+        # When...
+        start = time.perf_counter()
+        root = self.provider.get('root')
+        elapsed = time.perf_counter() - start
+        # Then...
+        self.assertEqual(['a', 'b', 'c'], [root.slow_a.label, root.slow_b.label, root.slow_c.label])
+        self.assertLess(elapsed, 3 * SlowService.DELAY)
+        self.assertEqual(3, len({s.thread for s in (root.slow_a, root.slow_b, root.slow_c)}))
+
+    def test_workers_share_the_context(self):
+        # Given...
+        slow_b = SlowService('set')
+        self.provider.set('slow-b', slow_b)
+        # When...
+        root = self.provider.get('root')
+        # Then...
+        self.assertIs(slow_b, root.slow_b)
+        self.assertIs(root.slow_c, self.provider.get('slow-c'))
+
+    def test_not_prefetching_overridden_dependencies(self):
+        # Given...
+        slow_c = SlowService('override')
+        # When...
+        root = self.provider.get('root', slow_c=slow_c)
+        # Then...
+        self.assertIs(slow_c, root.slow_c)
+        self.assertEqual({}, self.provider._context.state().scoped_services)
+
+    def test_reporting_errors_in_definition_order(self):
+        # When, then...
+        for _ in range(5):
+            with self.assertRaises(ValueError) as context:
+                self.provider.get('broken-root')
+            self.assertEqual('b', str(context.exception))
+
+    def test_not_prefetching_env_fallbacks(self):
+        # When...
+        with mock.patch.dict(os.environ, {'PYROVIDER_TEST_SLOW_B': '"set"'}):
+            root = self.provider.get('env-root')
+        # Then...
+        self.assertEqual('set', root.slow_b)
+        self.assertEqual(['slow-a'], self.provider._plans['env-root'].dependencies)
+        self.assertEqual(['slow-a', 'broken-b'], self.provider._graph.dependencies('env-root'))
+
+    def test_resolving_batches_once_on_the_workers(self):
+        # When...
+        root, swapped_root = self.provider.get_many(['root', 'swapped-root'])
+        pair_root, = self.provider.get_many(['pair-root'])
+        # Then...
+        self.assertIs(root.slow_a, swapped_root.slow_b)
+        self.assertIs(root.slow_b, swapped_root.slow_a)
+        self.assertIs(pair_root.slow_a.slow_a, pair_root.slow_b.slow_b)
+        self.assertIs(pair_root.slow_a.slow_b, pair_root.slow_b.slow_a)
+
+    def test_not_waiting_on_the_pool_while_building_a_singleton(self):
+        # Given...
+        provider = ServiceProvider(max_workers=1)
+        provider.conf(SERVICE_CONF)
+        get_obj = provider.importer.get_obj
+
+        def slow_get_obj(target):
+            # Keeps the lock of "single-root" while its user queues it on the pool.
+            time.sleep(0.2 if target.endswith('RootService') else 0)
+
+            return get_obj(target)
+
+        results = {}
+        threads = [threading.Thread(target=lambda n=n: results.setdefault(n, provider.get(n)), daemon=True)
+                   for n in ('single-root', 'single-user')]
+        # When...
+        with mock.patch.object(provider.importer, 'get_obj', side_effect=slow_get_obj):
+            threads[0].start()
+            time.sleep(0.05)
+            threads[1].start()
+
+            for thread in threads:
+                thread.join(5)
+        # Then...
+        self.assertFalse(any(t.is_alive() for t in threads))
+        self.assertIs(results['single-root'], results['single-user'].slow_a)
+
+    def test_building_dependencies_sequentially_by_default(self):
+        # Given...
+        provider = ServiceProvider()
+        provider.conf(SERVICE_CONF)
+        # When...
+        root = provider.get('root')
+        # Then...
+        self.assertEqual({threading.get_ident()},
+                         {s.thread for s in (root.slow_a, root.slow_b, root.slow_c)})
+
+
+class SlowService():
+
+    DELAY = 0.1
+
+    def __init__(self, label):
+        time.sleep(self.DELAY)
+        self.label = label
+        self.thread = threading.get_ident()
+
+
+class BrokenService():
+
+    def __init__(self, label):
+        time.sleep(0.05 if 'b' == label else 0)
+        raise ValueError(label)
+
+
+class RootService():
+
+    def __init__(self, slow_a, slow_b, slow_c=None):
+        self.slow_a = slow_a
+        self.slow_b = slow_b
+        self.slow_c = slow_c
+
+
+class UserService(RootService):
+
+    pass
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,14 +1,21 @@
 import os
+import threading
 import unittest
 import yaml
 
 from unittest import mock
 from pyrovider.meta.construction import Singleton
 from pyrovider.services.provider import (BadConfPathError,
+                                         BadMemoizeConfError,
+                                         BadPoolConfError,
+                                         CircularDependencyError,
+                                         InvalidServiceConfError,
                                          NoCreationMethodError,
                                          NotAServiceFactoryError,
+                                         PoolExhaustedError,
                                          ServiceFactory, ServiceProvider,
                                          TooManyCreationMethodsError,
+                                         UnknownScopeError,
                                          UnknownServiceError)
 
 
@@ -89,6 +96,31 @@ class ModelSchemataTest(unittest.TestCase):
         # Then...
         self.assertEqual("https://api.some-app.com/v1/", service_b.other_env_var)
 
+    def test_getting_a_service_with_a_changed_env_var_dependency(self):
+        # When...
+        os.environ['INT_ENV_VAR'] = '1'
+        service_b_1 = self.provider.get('service-b')
+        os.environ['INT_ENV_VAR'] = '2'
+        service_b_2 = self.provider.get('service-b')
+        # Then...
+        self.assertEqual(1, service_b_1.some_integer)
+        self.assertEqual(2, service_b_2.some_integer)
+
+    def test_caching_env_var_and_config_dependencies(self):
+        # Given...
+        os.environ['INT_ENV_VAR'] = '1'
+        os.environ['BOOL_ENV_VAR'] = 'False'
+        # When...
+        self.provider.get('service-b')
+        self.provider.get('service-b')
+        stats = self.provider.resolution_cache_stats()
+        self.provider.conf(self.service_conf, {'some_app': {'api': {'url': 'changed'}}})
+        service_b = self.provider.get('service-b')
+        # Then...
+        self.assertEqual({'env': {'hits': 4, 'misses': 4}, 'conf': {'hits': 2, 'misses': 2}}, stats)
+        self.assertEqual({'url': 'changed'}, service_b.some_configuration)
+        self.assertEqual('changed', service_b.other_env_var)
+
     def test_getting_a_service_with_a_list_of_references_dependency(self):
         # When...
         service_i = self.provider.get('service-i')
@@ -159,6 +191,530 @@ class ModelSchemataTest(unittest.TestCase):
         with self.assertRaises(NotImplementedError):
             self.provider.get('service-g')
 
+    def test_conf_compiles_service_plans(self):
+        # When...
+        plan = self.provider._plans['service-c']
+        # Then...
+        self.assertEqual('pyrovider.services.tests.test_provider.MockServiceFactory', plan.target)
+        self.assertEqual(['service-b', 'service-a'], plan.dependencies)
+        self.assertIsNone(plan.error)
+        self.assertIsInstance(self.provider._plans['service-e'].error, TooManyCreationMethodsError)
+
+    def test_getting_a_service_uses_the_compiled_plan(self):
+        # Given...
+        self.service_conf['service-a']['class'] = 'pyrovider.services.tests.test_provider.MockServiceC'
+        # When...
+        service_a = self.provider.get('service-a')
+        # Then...
+        self.assertIsInstance(service_a, MockServiceA)
+
+    def test_getting_a_service_with_an_import_reference(self):
+        # Given...
+        self.provider.conf({'service-x': {'class': 'pyrovider.services.tests.test_provider.MockServiceI',
+                                          'arguments': ['^pyrovider.services.tests.test_provider.MockServiceA',
+                                                        [[1, '@service-y']]]},
+                            'service-y': {'instance': 'pyrovider.services.tests.test_provider.mock_service_instance'}})
+        # When...
+        service_x = self.provider.get('service-x')
+        # Then...
+        self.assertIs(MockServiceA, service_x.some_services_1)
+        self.assertEqual([[1, mock_service_instance]], service_x.some_services_2)
+
+    def test_getting_a_transient_service(self):
+        # When...
+        service_a_1 = self.provider.get('service-a')
+        service_a_2 = self.provider.get('service-a')
+        # Then...
+        self.assertIsNot(service_a_1, service_a_2)
+
+    def test_getting_a_singleton_service(self):
+        # Given...
+        services = []
+        thread = threading.Thread(target=lambda: services.append(self.provider.get('service-j')))
+        # When...
+        service_j = self.provider.get('service-j')
+        self.provider.reset()
+        thread.start()
+        thread.join()
+        # Then...
+        self.assertIsInstance(service_j, MockServiceA)
+        self.assertIs(service_j, self.provider.get('service-j'))
+        self.assertIs(service_j, services[0])
+
+    def test_getting_a_context_service(self):
+        # Given...
+        services = []
+        thread = threading.Thread(target=lambda: services.append(self.provider.get('service-k')))
+        # When...
+        service_k = self.provider.get('service-k')
+        thread.start()
+        thread.join()
+        # Then...
+        self.assertIs(service_k, self.provider.get('service-k'))
+        self.assertIsNot(service_k, services[0])
+        self.provider.reset()
+        self.assertIsNot(service_k, self.provider.get('service-k'))
+
+    def test_getting_a_scoped_service_with_named_arguments(self):
+        # Given...
+        self.service_conf['service-c']['scope'] = 'singleton'
+        self.provider.conf(self.service_conf, self.app_conf)
+        service_a = object()
+        # When...
+        service_c = self.provider.get('service-c')
+        # Then...
+        self.assertIs(service_c, self.provider.get('service-c'))
+        self.assertIs(service_a, self.provider.get('service-c', service_a=service_a).service_a)
+        self.assertIs(service_c, self.provider.get('service-c'))
+
+    def test_getting_unknown_scope(self):
+        with self.assertRaises(UnknownScopeError) as context:
+            self.provider.get('service-l')
+        self.assertEqual('The scope "forever" of the service "service-l" is not one of: '
+                         'transient, context, singleton.',
+                         str(context.exception))
+
+    def test_acquiring_a_pooled_service(self):
+        # When...
+        with self.provider.acquire('service-n') as service_n_1:
+            with self.provider.acquire('service-n') as service_n_2:
+                with self.assertRaises(PoolExhaustedError):
+                    with self.provider.acquire('service-n', timeout=0):
+                        pass
+        with self.provider.acquire('service-n') as service_n_3:
+            pass
+        with self.assertRaises(RuntimeError):
+            with self.provider.acquire('service-n') as service_n_4:
+                raise RuntimeError()
+        # Then...
+        self.assertIsInstance(service_n_1, MockServiceA)
+        self.assertIsNot(service_n_1, service_n_2)
+        self.assertIs(service_n_1, service_n_3)
+        self.assertIs(service_n_3, service_n_4)
+        self.assertIsNot(self.provider.get('service-n'), self.provider.get('service-n'))
+        self.assertEqual({'service-n': {'created': 2, 'reused': 2, 'evicted': 0, 'waits': 1, 'peak': 2,
+                                        'max_size': 2, 'idle': 1, 'in_use': 0, 'size': 1}},
+                         self.provider.pool_stats())
+
+    def test_acquiring_a_service_not_pooled(self):
+        with self.assertRaises(BadPoolConfError) as context:
+            with self.provider.acquire('service-a'):
+                pass
+        self.assertEqual('The service "service-a" is not pooled.', str(context.exception))
+
+        with self.assertRaises(BadPoolConfError) as context:
+            self.provider.get('service-o')
+        self.assertEqual('The service "service-o" can\'t be pooled: instances are shared already.',
+                         str(context.exception))
+
+    def test_evicting_idle_pooled_services(self):
+        # Given...
+        self.service_conf['service-n']['pool']['idle_timeout'] = 0
+        self.provider.conf(self.service_conf, self.app_conf)
+        with self.provider.acquire('service-n') as service_n_1:
+            pass
+        # When...
+        with self.provider.acquire('service-n') as service_n_2:
+            pass
+        # Then...
+        self.assertIsNot(service_n_1, service_n_2)
+        self.assertEqual(2, self.provider.pool_stats()['service-n']['evicted'])
+
+    def test_disposing_of_instances_leaving_the_pool(self):
+        # Given...
+        resource = 'pyrovider.services.tests.test_provider.MockResource'
+        disposed = []
+        self.provider.conf({'cursor': {'class': resource, 'arguments': ['discarded'], 'pool': 2}})
+        with mock.patch.object(MockResource, 'disposed', disposed):
+            # When...
+            with self.assertRaises(RuntimeError):
+                with self.provider.acquire('cursor'):
+                    raise RuntimeError()
+            with self.provider.acquire('cursor'):
+                with self.provider.acquire('cursor'):
+                    pass
+                self.provider.reconf({'cursor': {'class': resource, 'arguments': ['evicted'],
+                                                 'pool': {'max_size': 2, 'idle_timeout': 0}}})
+            with self.provider.acquire('cursor'):
+                pass
+        # Then...
+        self.assertEqual(['discarded (close)'] * 3 + ['evicted (close)'], disposed)
+
+    def test_getting_a_service_with_circular_dependencies(self):
+        # Given...
+        self.service_conf['service-a']['arguments'] = ['@service-c']
+        self.provider.conf(self.service_conf, self.app_conf)
+        # When, then...
+        with self.assertRaises(CircularDependencyError) as context:
+            self.provider.get('service-b')
+        self.assertEqual('The service "service-a" depends on itself: '
+                         'service-a -> service-c -> service-b -> service-a.',
+                         str(context.exception))
+
+    def test_validating_service_conf(self):
+        # Given...
+        self.service_conf['service-a']['arguments'] = ['@service-z', '%some_app.nope%']
+        # When...
+        with self.assertRaises(InvalidServiceConfError) as context:
+            self.provider.conf(self.service_conf, self.app_conf, validate=True)
+        # Then...
+        self.assertEqual('The service "service-a" depends on "service-z", which is not a service we know of.\n'
+                         'The path "nope" was not found in the app configuration. (service "service-a")\n'
+                         'You must define either a class, an instance, or a factory '
+                         'for the service "service-d", none was found.\n'
+                         'You must define either a class, an instance, or a factory '
+                         'for the service "service-e", not both.\n'
+                         'The scope "forever" of the service "service-l" is not one of: '
+                         'transient, context, singleton.\n'
+                         'The service "service-o" can\'t be pooled: instances are shared already.',
+                         str(context.exception))
+
+    def test_validating_parent_dependencies(self):
+        # Given...
+        parent = ServiceProvider(name='parent')
+        parent.conf({'service-x': {'class': 'pyrovider.services.tests.test_provider.MockServiceA'}})
+        provider = ServiceProvider(parent)
+        # When, then...
+        provider.conf({'service-y': {'class': 'pyrovider.services.tests.test_provider.MockServiceI',
+                                     'arguments': ['@parent.service-x', '@service-y-2']},
+                       'service-y-2': {'class': 'pyrovider.services.tests.test_provider.MockServiceA'}},
+                      validate=True)
+        with self.assertRaises(InvalidServiceConfError):
+            provider.conf({'service-y': {'class': 'pyrovider.services.tests.test_provider.MockServiceA',
+                                         'arguments': ['@parent.service-z']}},
+                          validate=True)
+
+    def test_warming_singletons(self):
+        # Given...
+        self.service_conf['service-b']['scope'] = 'singleton'
+        self.provider.conf(self.service_conf, self.app_conf)
+        # When...
+        self.provider.warm(max_workers=2)
+        # Then...
+        self.assertIsInstance(self.provider._plans['service-b'].instance, MockServiceB)
+        self.assertIs(self.provider._plans['service-j'].instance, self.provider.get('service-j'))
+        self.assertIs(self.provider._plans['service-b'].instance, self.provider.get('service-b'))
+
+    def test_getting_services_of_nested_parent_providers(self):
+        # Given...
+        mock_a = 'pyrovider.services.tests.test_provider.MockServiceA'
+        platform = ServiceProvider(name='platform')
+        other = ServiceProvider(name='other')
+        team = ServiceProvider(other, platform, name='team')
+        provider = ServiceProvider(team)
+        provider.conf({'service-x': {'class': mock_a, 'arguments': ['@team.platform.db']}})
+        # Configured after their children
+        platform.conf({'db': {'class': mock_a, 'scope': 'singleton'}})
+        team.conf({'api': {'class': mock_a}})
+        # When...
+        db = provider.get('team.platform.db')
+        # Then...
+        self.assertIs(db, getattr(provider, 'team.platform.db'))
+        self.assertIs(db, platform.get('db'))
+        self.assertIsInstance(getattr(provider, 'team.api'), MockServiceA)
+        self.assertIs(platform, provider.team.platform)
+        self.assertEqual((platform, 'db'), provider._routes['team.platform.db'])
+        self.assertTrue(provider.has('team.platform.db'))
+        self.assertFalse(provider.has('team.platform.nope'))
+        with self.assertRaises(AttributeError):
+            getattr(provider, 'team.platform.nope')
+        with self.assertRaises(UnknownServiceError):
+            provider.get('team.nope.db')
+
+    def test_rebuilding_routes_only_after_parents_change(self):
+        # Given...
+        mock_a = 'pyrovider.services.tests.test_provider.MockServiceA'
+        platform = ServiceProvider(name='platform')
+        team = ServiceProvider(platform, name='team')
+        provider = ServiceProvider(team)
+        provider.conf({})
+        team.conf({})
+        platform.conf({'db': {'class': mock_a}})
+        provider.has('team.platform.db')
+        # When...
+        with mock.patch.object(ServiceProvider, '_build_routes', autospec=True,
+                               side_effect=ServiceProvider._build_routes) as build_routes:
+            for _ in range(3):
+                self.assertFalse(provider.has('team.platform.nope'))
+                self.assertFalse(hasattr(provider, 'nope'))
+            routes_built = build_routes.call_count
+            platform.conf({'db': {'class': mock_a}, 'cache': {'class': mock_a}})
+            # Then...
+            self.assertTrue(provider.has('team.platform.cache'))
+        self.assertEqual(0, routes_built)
+        self.assertEqual(2, build_routes.call_count)
+
+    def test_dropping_fork_unsafe_services_after_fork(self):
+        # Given...
+        mock_a = 'pyrovider.services.tests.test_provider.MockServiceA'
+        mock_i = 'pyrovider.services.tests.test_provider.MockServiceI'
+        parent = ServiceProvider(name='parent')
+        parent.conf({'socket': {'class': mock_a, 'scope': 'singleton', 'fork_safe': False}})
+        provider = ServiceProvider(parent)
+        provider.conf({'settings': {'class': mock_a, 'scope': 'singleton'},
+                       'client': {'class': mock_i, 'scope': 'singleton',
+                                  'arguments': ['@parent.socket', '@settings']},
+                       'cursors': {'class': mock_a, 'pool': 2, 'fork_safe': False},
+                       'tenant': {'class': mock_a, 'memoize': {'on_evict': 'close'}, 'fork_safe': False},
+                       'report': {'class': mock_a, 'memoize': True}})
+        provider.warm(fork_safe_only=True)
+        settings, client, socket, tenant, report = (provider.get(n) for n in (
+            'settings', 'client', 'parent.socket', 'tenant', 'report'))
+        memo_lock, conf_lock = provider._plans['tenant'].memo._lock, provider._conf_lock
+        provider.reloader = mock.Mock()
+        with provider.acquire('cursors') as cursor:
+            pass
+        # When...
+        with mock.patch.object(MockServiceA, 'close', create=True) as close:
+            provider.after_fork()
+        # Then...
+        self.assertIsNot(conf_lock, provider._conf_lock)
+        provider.reloader.after_fork.assert_called_once_with()
+        self.assertEqual({'client', 'cursors', 'parent.socket', 'tenant'}, provider.fork_unsafe_services())
+        close.assert_not_called()
+        self.assertIsNot(memo_lock, provider._plans['tenant'].memo._lock)
+        self.assertIsNot(tenant, provider.get('tenant'))
+        self.assertIs(report, provider.get('report'))
+        self.assertIs(settings, provider.get('settings'))
+        self.assertIsNot(client, provider.get('client'))
+        self.assertIsNot(socket, provider.get('parent.socket'))
+        with provider.acquire('cursors') as other_cursor:
+            self.assertIsNot(cursor, other_cursor)
+
+    @unittest.skipUnless(hasattr(os, 'register_at_fork'), "os.register_at_fork() is required")
+    def test_rebuilding_fork_unsafe_services_in_forked_processes(self):
+        # Given...
+        self.service_conf['service-j']['fork_safe'] = False
+        self.service_conf['service-k'] = {'class': 'pyrovider.services.tests.test_provider.MockServiceA',
+                                          'scope': 'singleton'}
+        self.provider.conf(self.service_conf, self.app_conf)
+        service_j, service_k = self.provider.get('service-j'), self.provider.get('service-k')
+        read_fd, write_fd = os.pipe()
+        # When...
+        pid = os.fork()
+        if not pid:
+            os.close(read_fd)
+            os.write(write_fd, bytes([service_j is self.provider.get('service-j'),
+                                      service_k is self.provider.get('service-k')]))
+            os._exit(0)
+        os.close(write_fd)
+        with os.fdopen(read_fd, 'rb') as fp:
+            shared = fp.read()
+        os.waitpid(pid, 0)
+        # Then...
+        self.assertEqual(bytes([False, True]), shared)
+
+    def test_getting_a_service_with_lazy_dependencies(self):
+        # When...
+        with mock.patch.object(MockServiceFactory, 'build', autospec=True,
+                               side_effect=MockServiceFactory.build) as build:
+            service_m = self.provider.get('service-m')
+            built_eagerly = build.called
+            service_c_b = service_m.some_services_1.service_b
+        # Then...
+        self.assertFalse(built_eagerly)
+        self.assertIsInstance(service_c_b, MockServiceB)
+        self.assertIsInstance(service_m.some_services_1, MockServiceC)
+        self.assertIsInstance(service_m.some_services_2[1].some_services_2[0], MockServiceA)
+        self.assertEqual([], self.provider._plans['service-m'].dependencies)
+        self.assertEqual(['service-c', 'service-a', 'service-m'],
+                         self.provider._plans['service-m'].lazy_dependencies)
+
+    def test_preloading_imports(self):
+        # Given...
+        self.provider.conf({'service-x': {'class': 'pyrovider.services.tests.test_provider.MockServiceI',
+                                          'arguments': ['^pyrovider.tools.listtools.flatten_list', []]},
+                            'service-y': {}})
+        # When...
+        with mock.patch.object(self.provider.importer, 'preload') as preload:
+            self.provider.preload(background=True)
+        # Then...
+        preload.assert_called_once_with(['pyrovider.services.tests.test_provider.MockServiceI',
+                                         'pyrovider.tools.listtools.flatten_list'],
+                                        background=True)
+
+    def test_reconfiguring_only_rebuilds_affected_services(self):
+        # Given...
+        mock_a = 'pyrovider.services.tests.test_provider.MockServiceA'
+        mock_i = 'pyrovider.services.tests.test_provider.MockServiceI'
+        service_conf = {'service-x': {'class': mock_a, 'scope': 'singleton'},
+                        'service-y': {'class': mock_a, 'scope': 'singleton'},
+                        'service-z': {'class': mock_i, 'scope': 'singleton',
+                                      'arguments': ['@service-y', '%some_app.api.version%']}}
+        self.provider.conf(service_conf, self.app_conf)
+        x, y, z = (self.provider.get(n) for n in ('service-x', 'service-y', 'service-z'))
+        # When...
+        affected = self.provider.reconf(dict(service_conf, **{'service-y': {'class': mock_a,
+                                                                           'scope': 'context'}}))
+        # Then...
+        self.assertEqual({'service-y', 'service-z'}, affected)
+        self.assertIs(x, self.provider.get('service-x'))
+        self.assertIsNot(y, self.provider.get('service-y'))
+        self.assertIsNot(z, self.provider.get('service-z'))
+
+        # When...
+        z = self.provider.get('service-z')
+        affected = self.provider.reconf(self.provider.service_conf,
+                                        dict(self.app_conf, some_app={'api': {'version': '2'}}))
+        # Then...
+        self.assertEqual({'service-z'}, affected)
+        self.assertEqual('2', self.provider.get('service-z').some_services_2)
+        self.assertEqual('1', z.some_services_2)
+
+        # When...
+        z = self.provider.get('service-z')
+        affected = self.provider.reconf(self.provider.service_conf,
+                                        dict(self.provider.app_conf, other_app={'api': {'version': '3'}}))
+        # Then...
+        self.assertEqual(set(), affected)
+        self.assertIs(z, self.provider.get('service-z'))
+
+        # When...
+        affected = self.provider.reconf({'service-x': service_conf['service-x']})
+        # Then...
+        self.assertEqual({'service-y', 'service-z'}, affected)
+        self.assertIs(x, self.provider.get('service-x'))
+        self.assertEqual(['service-x'], self.provider.service_names)
+        with self.assertRaises(UnknownServiceError):
+            self.provider.get('service-z')
+
+    def test_reconfiguring_the_services_of_child_providers(self):
+        # Given...
+        mock_a = 'pyrovider.services.tests.test_provider.MockServiceA'
+        resource = 'pyrovider.services.tests.test_provider.MockResource'
+        parent = ServiceProvider(name='parent')
+        parent.conf({'settings': {'class': mock_a, 'scope': 'singleton'}})
+        child = ServiceProvider(parent, name='child')
+        child.conf({'repo': {'class': resource, 'arguments': ['repo', '@parent.settings'],
+                             'scope': 'singleton'},
+                    'conn': {'class': resource, 'arguments': ['conn', '@parent.settings'],
+                             'scope': 'context'},
+                    'other': {'class': mock_a, 'scope': 'singleton'}})
+        grandchild = ServiceProvider(child)
+        grandchild.conf({'user': {'class': resource, 'arguments': ['user', '@child.repo'],
+                                  'scope': 'singleton'},
+                         'admin': {'class': resource, 'arguments': ['admin', '@child.parent.settings'],
+                                   'scope': 'singleton'}})
+        repo, conn, other = (child.get(n) for n in ('repo', 'conn', 'other'))
+        user, admin = grandchild.get('user'), grandchild.get('admin')
+        # When...
+        parent.reconf({'settings': {'class': mock_a, 'scope': 'context'}})
+        # Then...
+        settings = parent.get('settings')
+        self.assertIsNot(repo, child.get('repo'))
+        self.assertIs(settings, child.get('repo').dependencies[0])
+        self.assertIs(settings, child.get('conn').dependencies[0])
+        self.assertIsNot(conn, child.get('conn'))
+        self.assertIs(other, child.get('other'))
+        self.assertIs(child.get('repo'), grandchild.get('user').dependencies[0])
+        self.assertIs(settings, grandchild.get('admin').dependencies[0])
+        self.assertIsNot(user, grandchild.get('user'))
+        self.assertIsNot(admin, grandchild.get('admin'))
+
+    def test_getting_memoized_services(self):
+        # Given...
+        self.service_conf['service-c']['memoize'] = {'max_size': 2, 'on_evict': 'close'}
+        self.provider.conf(self.service_conf, self.app_conf)
+        service_a_1, service_a_2, service_a_3 = MockServiceA(), MockServiceA(), MockServiceA()
+        # When...
+        with mock.patch.object(MockServiceC, 'close', create=True) as close:
+            service_c_1 = self.provider.get('service-c', service_a=service_a_1)
+            service_c_2 = self.provider.get('service-c', service_a=service_a_2)
+            hit = self.provider.get('service-c', service_a=service_a_1)
+            self.provider.get('service-c', service_a=service_a_3)
+            # Then...
+            close.assert_called_once_with()
+        self.assertIs(service_c_1, hit)
+        self.assertIsNot(service_c_1, service_c_2)
+        self.assertIs(service_a_2, service_c_2.service_a)
+        self.assertIsNot(self.provider.get('service-c', service_a=[]),
+                         self.provider.get('service-c', service_a=[]))
+        self.assertEqual({'service-c': {'hits': 1, 'misses': 3, 'evictions': 1, 'expirations': 0,
+                                        'size': 2, 'max_size': 2, 'hit_rate': 0.25}},
+                         self.provider.memo_stats())
+
+    def test_memoizing_instance_services(self):
+        # Given...
+        self.service_conf['service-h']['memoize'] = True
+        self.provider.conf(self.service_conf, self.app_conf)
+        # When, then...
+        with self.assertRaises(BadMemoizeConfError) as context:
+            self.provider.get('service-h')
+        self.assertEqual('The service "service-h" can\'t be memoized: instances are shared already.',
+                         str(context.exception))
+
+    def test_memoizing_scoped_services(self):
+        # Given...
+        self.service_conf['service-c'].update(memoize=True, scope='context')
+        self.provider.conf(self.service_conf, self.app_conf)
+        # When, then...
+        with self.assertRaises(BadMemoizeConfError) as context:
+            self.provider.get('service-c')
+        self.assertEqual('The service "service-c" can\'t be memoized: it has the "context" scope.',
+                         str(context.exception))
+
+    def test_disposing_context_services_on_reset(self):
+        # Given...
+        resource = 'pyrovider.services.tests.test_provider.MockResource'
+        disposed = []
+        self.provider.conf({'pool': {'class': resource, 'arguments': ['pool'], 'scope': 'context'},
+                            'db': {'class': resource, 'arguments': ['db', '@pool'], 'scope': 'context'},
+                            'cache': {'class': resource, 'arguments': ['cache'], 'scope': 'context',
+                                      'dispose': 'shutdown'},
+                            'kept': {'class': resource, 'arguments': ['kept'], 'scope': 'context',
+                                     'dispose': False},
+                            'broken': {'class': resource, 'arguments': ['broken'], 'scope': 'context',
+                                       'dispose': 'nope'},
+                            'temp': {'class': resource, 'arguments': ['temp']}})
+        instrument = mock.Mock()
+        self.provider.add_instrument(instrument)
+        for name in ('db', 'cache', 'kept', 'broken', 'temp'):
+            self.provider.get(name)
+        # When...
+        with mock.patch.object(MockResource, 'disposed', disposed):
+            report = self.provider.reset()
+        # Then...
+        self.assertEqual(['cache (shutdown)', 'db (close)', 'pool (close)'], disposed)
+        self.assertEqual(3, report['disposed'])
+        self.assertEqual(['broken'], [name for name, e in report['errors']])
+        self.assertIsInstance(report['errors'][0][1], AttributeError)
+        self.assertLessEqual(0, report['elapsed'])
+        instrument.teardown_finished.assert_called_once_with(self.provider, **report)
+        self.assertEqual({}, self.provider._context.state().scoped_services)
+
+    def test_disposing_context_services_in_the_background(self):
+        # Given...
+        disposed = []
+        self.provider.conf({'pool': {'class': 'pyrovider.services.tests.test_provider.MockResource',
+                                     'arguments': ['pool'], 'scope': 'context'}})
+        self.provider.get('pool')
+        # When...
+        with mock.patch.object(MockResource, 'disposed', disposed):
+            report = self.provider.reset(background=True).result()
+        # Then...
+        self.assertEqual(1, report['disposed'])
+        self.assertEqual(['pool (close)'], disposed)
+
+    def test_getting_many_services(self):
+        # When...
+        service_i, service_b, service_c = self.provider.get_many(['service-i', 'service-b', 'service-c'])
+        # Then...
+        self.assertIs(service_b, service_i.some_services_1[1])
+        self.assertIs(service_c, service_i.some_services_2[0])
+        self.assertIs(service_b, service_c.service_b)
+        self.assertIs(service_b.service_a, service_i.some_services_1[0])
+        self.assertIs(service_b.service_a, service_c.service_a)
+        self.assertIsNot(service_b, self.provider.get_many(['service-b'])[0])
+
+    def test_getting_many_services_with_stats(self):
+        # Given...
+        self.provider.collect_stats()
+        # When...
+        self.provider.get_many(['service-b', 'service-c'])
+        # Then...
+        self.assertEqual({'service-a': 1, 'service-b': 1, 'service-c': 1},
+                         {name: stats['count'] for name, stats in self.provider.stats().items()})
+
     def test_setting_known_service(self):
         # Given...
         service = mock.MagicMock()
@@ -220,6 +776,21 @@ class MockServiceI():
         self.some_services_2 = some_services_2
 
 
+class MockResource():
+
+    disposed = []
+
+    def __init__(self, name, *dependencies):
+        self.name = name
+        self.dependencies = dependencies
+
+    def close(self):
+        self.disposed.append(f"{self.name} (close)")
+
+    def shutdown(self):
+        self.disposed.append(f"{self.name} (shutdown)")
+
+
 class MockServiceFactory(ServiceFactory):
 
     def __init__(self, service_b, service_a=None):
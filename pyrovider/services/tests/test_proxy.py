@@ -0,0 +1,58 @@
+import unittest
+
+from unittest import mock
+from pyrovider.services.proxy import LazyServiceProxy
+
+
+class LazyServiceProxyTest(unittest.TestCase):
+
+    maxDiff = None
+
+    def setUp(self):
+        # Given...
+        self.resolver = mock.MagicMock(return_value=MockService())
+        self.proxy = LazyServiceProxy(self.resolver)
+
+    def test_resolving_on_first_use(self):
+        # When...
+        repr_before = repr(self.proxy)
+        value = self.proxy.value
+        # Then...
+        self.assertEqual('<LazyServiceProxy (unresolved)>', repr_before)
+        self.assertEqual(1, value)
+        self.assertTrue(self.proxy.is_resolved)
+        self.assertEqual('<MockService>', repr(self.proxy))
+
+    def test_resolving_once(self):
+        # When...
+        self.proxy.value = 2
+        self.proxy()
+        # Then...
+        self.resolver.assert_called_once_with()
+        self.assertEqual(2, self.resolver.return_value.value)
+
+    def test_behaving_as_the_service(self):
+        # When, then...
+        self.assertIsInstance(self.proxy, MockService)
+        self.assertEqual('called', self.proxy())
+        self.assertEqual(['a', 'b'], list(self.proxy))
+        self.assertIn('a', self.proxy)
+        self.assertEqual(self.resolver.return_value, self.proxy)
+
+
+class MockService():
+
+    value = 1
+
+    def __call__(self):
+        return 'called'
+
+    def __iter__(self):
+        return iter(['a', 'b'])
+
+    def __repr__(self):
+        return '<MockService>'
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pyrovider.services.snapshot import load_snapshot, save_snapshot, source_fingerprint
+
+
+class SnapshotTest(unittest.TestCase):
+
+    maxDiff = None
+
+    def setUp(self):
+        # Given...
+        self.directory = tempfile.mkdtemp()
+        self.source_path = os.path.join(self.directory, 'service_conf.yaml')
+        self.snapshot_path = os.path.join(self.directory, 'snapshot.bin')
+        self.data = {'service_conf': {'service-a': {'class': 'some.Class'}}}
+
+        with open(self.source_path, 'w') as fp:
+            fp.write("service-a:\n  class: some.Class\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_loading_a_saved_snapshot(self):
+        # When...
+        save_snapshot(self.snapshot_path, [self.source_path], self.data, key='key')
+        # Then...
+        self.assertEqual(self.data, load_snapshot(self.snapshot_path, [self.source_path], key='key'))
+
+    def test_not_loading_a_missing_or_corrupt_snapshot(self):
+        # When, then...
+        self.assertIsNone(load_snapshot(self.snapshot_path, [self.source_path]))
+        with open(self.snapshot_path, 'wb') as fp:
+            fp.write(b'garbage')
+        self.assertIsNone(load_snapshot(self.snapshot_path, [self.source_path]))
+
+    def test_not_loading_a_snapshot_for_other_sources_or_keys(self):
+        # When...
+        save_snapshot(self.snapshot_path, [self.source_path], self.data, key='key')
+        # Then...
+        self.assertIsNone(load_snapshot(self.snapshot_path, [self.source_path], key='other'))
+        self.assertIsNone(load_snapshot(self.snapshot_path, [], key='key'))
+
+    def test_not_loading_a_stale_snapshot(self):
+        # Given...
+        save_snapshot(self.snapshot_path, [self.source_path], self.data)
+        # When...
+        with open(self.source_path, 'w') as fp:
+            fp.write("service-a:\n  class: other.Class\n")
+        # Then...
+        self.assertIsNone(load_snapshot(self.snapshot_path, [self.source_path]))
+
+    def test_loading_a_snapshot_of_touched_sources(self):
+        # Given...
+        save_snapshot(self.snapshot_path, [self.source_path], self.data)
+        # When...
+        stat = os.stat(self.source_path)
+        os.utime(self.source_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        # Then...
+        self.assertEqual(self.data, load_snapshot(self.snapshot_path, [self.source_path]))
+
+    def test_not_loading_a_snapshot_of_sources_changed_while_parsed(self):
+        # Given...
+        fingerprints = [source_fingerprint(self.source_path)]
+        # When...
+        with open(self.source_path, 'a') as fp:
+            fp.write("service-b:\n  class: some.Class\n")
+        save_snapshot(self.snapshot_path, [self.source_path], self.data, fingerprints=fingerprints)
+        # Then...
+        self.assertIsNone(load_snapshot(self.snapshot_path, [self.source_path]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,45 +1,206 @@
+from collections.abc import Mapping, MutableMapping, MutableSequence, Sequence
+from functools import lru_cache
+
+
+class PathAccessor:
+    """
+    Gets the node at a path within nested mappings and sequences, the path
+    being split, and its sequence indices parsed, once.
+
+    Mapping keys are matched as given; parts made of digits also index
+    sequences. The walk stops at the first node which is neither, returning
+    it, like dictpath() always did. Missing keys and indices raise a KeyError
+    holding the part not found.
+    """
+
+    __slots__ = ('parts', '_steps')
+
+    def __init__(self, parts):
+        self.parts = tuple(parts)
+        self._steps = tuple((part, _index(part)) for part in self.parts)
+
+    def __call__(self, node):
+        for key, index in self._steps:
+            if type(node) is dict or isinstance(node, Mapping):
+                node = node[key]
+            elif index is not None and isinstance(node, Sequence) and not isinstance(node, (str, bytes)):
+                try:
+                    node = node[index]
+                except IndexError:
+                    raise KeyError(key) from None
+            else:
+                break
+
+        return node
+
+    def __repr__(self):
+        return f"{PathAccessor.__name__}({list(self.parts)!r})"
+
+
+def _index(part) -> int:
+    if isinstance(part, int) and not isinstance(part, bool):
+        return part
+
+    if isinstance(part, str) and part.isdigit():
+        return int(part)
+
+    return None
+
+
+@lru_cache(maxsize=4096)
+def compile_path(path: str, separator: str = '.') -> PathAccessor:
+    """The accessor of a separated path such as "some_app.servers.0.host", cached."""
+    return PathAccessor(path.split(separator))
 
 
 def dictpath(dictionary: dict, path: list):
     """
     Find the node within a dictionary described by the path list.
     """
-    if not path or type(dictionary) != dict:
-        return dictionary
-    else:
-        return dictpath(dictionary[path.pop(0)], path)
+    return PathAccessor(path)(dictionary)
 
 
 def dictiter(arg):
-    if isinstance(arg, dict):
+    if type(arg) is dict or isinstance(arg, Mapping):
         return iter(arg.items())
-    elif isinstance(arg, list):
+    elif type(arg) is list or _is_sequence(arg):
         return enumerate(arg)
     else:
         raise TypeError("Not iterable as dictionary.")
 
 
-def dictwalk(arg, func: callable, path: tuple = None):
-    if path is None:
-        path = ()
+def _is_sequence(arg) -> bool:
+    return isinstance(arg, Sequence) and not isinstance(arg, (str, bytes, bytearray))
 
-    if type(arg) in (list, dict):
-        for k, v in dictiter(arg):
-            loop_path = path + (k,)
 
-            if type(v) in (list, dict):
-                dictwalk(v, func, loop_path)
-            else:
-                arg[k] = func(k, v, loop_path)
-    else:
+_CONTAINER_TYPES = {dict: True, list: True, str: False, int: False, float: False, bool: False,
+                    type(None): False}
+
+
+def _is_container(arg) -> bool:
+    # Checking against the ABCs is slow, so the answer is kept per type.
+    try:
+        return _CONTAINER_TYPES[type(arg)]
+    except KeyError:
+        return _CONTAINER_TYPES.setdefault(type(arg), isinstance(arg, Mapping) or _is_sequence(arg))
+
+
+_MUTABLE_CONTAINER_TYPES = dict(_CONTAINER_TYPES)
+
+
+def _is_mutable_container(arg) -> bool:
+    # Only these can have their values replaced: tuples and the like are leaves.
+    try:
+        return _MUTABLE_CONTAINER_TYPES[type(arg)]
+    except KeyError:
+        return _MUTABLE_CONTAINER_TYPES.setdefault(type(arg), isinstance(arg, MutableMapping) or (
+            isinstance(arg, MutableSequence) and not isinstance(arg, bytearray)))
+
+
+def _walk(arg, path: list, containers: bool = False, mutable: bool = False):
+    """
+    Yields (container, key, value) for every value under arg which is neither
+    a mapping nor a sequence, or for every one which is when containers is
+    true, parents first, keeping the path of the value in the given list.
+    With mutable, immutable mappings and sequences are values like others.
+    It's iterative, so any depth goes.
+    """
+    iterators = [dictiter(arg)]
+    parents = [arg]
+    is_container = _is_mutable_container if mutable else _is_container
+
+    while iterators:
+        parent = parents[-1]
+
+        for k, v in iterators[-1]:
+            if is_container(v):
+                path.append(k)
+
+                if containers:
+                    yield parent, k, v
+
+                iterators.append(dictiter(v))
+                parents.append(v)
+                break
+
+            if not containers:
+                path.append(k)
+
+                yield parent, k, v
+
+                path.pop()
+        else:
+            iterators.pop()
+            parents.pop()
+
+            if path:
+                path.pop()
+
+
+def dictleaves(arg):
+    """
+    Yields (path, value) for every value under arg which is neither a mapping
+    nor a sequence, lazily. The path is a single list updated as the walk
+    goes: copy it to keep it past the next value.
+    """
+    if not _is_container(arg):
+        raise TypeError("Not walkable as dictionary.")
+
+    path = []
+
+    for parent, k, v in _walk(arg, path):
+        yield path, v
+
+
+def dictwalk(arg, func: callable, path: tuple = None):
+    """
+    Replaces, in place, every value under arg which is neither a mutable
+    mapping nor a mutable sequence with what func(key, value, path) returns,
+    the path being the tuple of keys leading to the value. Tuples and other
+    immutable containers are values, as they can't be written to.
+    """
+    if not _is_mutable_container(arg):
         raise TypeError("Not walkable as dictionary.")
 
+    prefix = tuple(path or ())
+    path = []
+
+    for parent, k, v in _walk(arg, path, mutable=True):
+        parent[k] = func(k, v, prefix + tuple(path))
+
+
+def _sort_key(v):
+    """A key ordering any values, so lists mixing types can be sorted."""
+    if v is None:
+        return 0,
+    elif isinstance(v, (bool, int, float)):
+        return 1, v
+    elif isinstance(v, str):
+        return 2, v
+    elif isinstance(v, (bytes, bytearray)):
+        return 3, bytes(v)
+    elif isinstance(v, Mapping):
+        return 5, tuple(sorted((str(k), _sort_key(i)) for k, i in v.items()))
+    elif isinstance(v, Sequence):
+        return 4, tuple(_sort_key(i) for i in v)
+
+    return 6, repr(v)
+
 
 def dictsort(arg):
-    def sort_lists(k, v, path):
-        if isinstance(k, list):
-            return sorted(v)
+    """
+    Sorts, in place, every list under arg, inner lists first, so that
+    documents differing only by the order of their lists end up equal.
+    Values of different types are ordered by type, and lists within tuples
+    or other immutable containers are left alone. Returns arg.
+    """
+    if not _is_mutable_container(arg):
+        raise TypeError("Not walkable as dictionary.")
+
+    lists = [arg] if isinstance(arg, list) else []
+    lists += [v for parent, k, v in _walk(arg, [], containers=True, mutable=True) if isinstance(v, list)]
 
-        return v
+    for v in reversed(lists):
+        v.sort(key=_sort_key)
 
-    return dictwalk(arg, sort_lists)
+    return arg
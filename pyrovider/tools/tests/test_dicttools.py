@@ -1,6 +1,8 @@
 import unittest
 
-from pyrovider.tools.dicttools import dictiter, dictpath, dictwalk
+from types import MappingProxyType
+
+from pyrovider.tools.dicttools import compile_path, dictiter, dictleaves, dictpath, dictsort, dictwalk
 
 
 class DictToolsTest(unittest.TestCase):
@@ -44,6 +46,54 @@ class DictToolsTest(unittest.TestCase):
                                           "This one we won't"]}},
                          d)
 
+    def test_dictwalk_immutable_containers(self):
+        # Given...
+        proxy = MappingProxyType({"key": "phrase"})
+        d = {"yeah": (1, 2), "wee": [proxy, ("phrase", [3, 1])]}
+        # When...
+        dictwalk(d, lambda k, v, path: (k, v))
+        dictsort(d)
+        # Then...
+        self.assertEqual({"yeah": ("yeah", (1, 2)), "wee": [(0, proxy), (1, ("phrase", [3, 1]))]}, d)
+
+    def test_dictleaves(self):
+        # Given...
+        d = {"yeah": 2,
+             "wee": MappingProxyType({"key": ("phrase", [4, {}], "other phrase")}),
+             "nah": "Not walked into."}
+        # When...
+        leaves = [(tuple(path), v) for path, v in dictleaves(d)]
+        # Then...
+        self.assertEqual([(("yeah",), 2),
+                          (("wee", "key", 0), "phrase"),
+                          (("wee", "key", 1, 0), 4),
+                          (("wee", "key", 2), "other phrase"),
+                          (("nah",), "Not walked into.")],
+                         leaves)
+
+    def test_dictwalk_deep_documents(self):
+        # Given...
+        d = node = {}
+        for i in range(5000):
+            node["next"] = node = {}
+        node["leaf"] = "phrase"
+        # When...
+        dictwalk(d, lambda k, v, path: f"{v} at depth {len(path)}")
+        # Then...
+        self.assertEqual(["phrase at depth 5001"], [v for path, v in dictleaves(d)])
+
+    def test_dictsort(self):
+        # Given...
+        d = {"yeah": [3, "b", None, 1.5, "a", True],
+             "wee": [{"key": [2, 1]}, {"key": [1, 0]}, [[2, 1], 0]]}
+        # When...
+        result = dictsort(d)
+        # Then...
+        self.assertIs(d, result)
+        self.assertEqual({"yeah": [None, True, 1.5, 3, "a", "b"],
+                          "wee": [[0, [1, 2]], {"key": [0, 1]}, {"key": [1, 2]}]},
+                         d)
+
     def test_dictpath(self):
         # Given...
         d = {"yeah": 2,
@@ -59,6 +109,30 @@ class DictToolsTest(unittest.TestCase):
                           "This one we won't"],
                          v)
 
+    def test_dictpath_through_mappings_and_lists(self):
+        # Given...
+        d = {"wee": MappingProxyType({"servers": [{"host": "a"}, {"host": "b"}]}),
+             "text": "Not walked into."}
+        path = ["wee", "servers", "1", "host"]
+        # When...
+        v = dictpath(d, path)
+        # Then...
+        self.assertEqual("b", v)
+        self.assertEqual(["wee", "servers", "1", "host"], path)
+        self.assertEqual([{"host": "a"}, {"host": "b"}], dictpath(d, ["wee", "servers", "host"]))
+        self.assertEqual("Not walked into.", dictpath(d, ["text", "0"]))
+        with self.assertRaises(KeyError) as context:
+            dictpath(d, ["wee", "servers", "2", "host"])
+        self.assertEqual(("2",), context.exception.args)
+
+    def test_compiled_paths(self):
+        # When...
+        accessor = compile_path("wee.key.1")
+        # Then...
+        self.assertIs(accessor, compile_path("wee.key.1"))
+        self.assertEqual(("wee", "key", "1"), accessor.parts)
+        self.assertEqual(4, accessor({"wee": {"key": ["phrase", 4]}}))
+
 
 if __name__ == '__main__':
     unittest.main()